@@ -102,6 +102,29 @@ class Settings:
     USE_TOON = os.getenv('USE_TOON', 'true').lower() == 'true'
     print(f"[CONFIG]  Token Optimization (TOON): {'Enabled' if USE_TOON else 'Disabled'}")
 
+    # Client-side AI rate limits (0 = unlimited); set to the account's requests/tokens per minute
+    AI_RATE_LIMIT_RPM = int(os.getenv('AI_RATE_LIMIT_RPM', 0))
+    AI_RATE_LIMIT_TPM = int(os.getenv('AI_RATE_LIMIT_TPM', 0))
+    print(f"[CONFIG]  AI Rate Limits - RPM: {AI_RATE_LIMIT_RPM or 'unlimited'}, TPM: {AI_RATE_LIMIT_TPM or 'unlimited'}")
+
+    # Exact-match AI response cache (Redis when REDIS_URL is set, otherwise in-process)
+    AI_RESPONSE_CACHE_ENABLED = os.getenv('AI_RESPONSE_CACHE_ENABLED', 'false').lower() == 'true'
+    AI_RESPONSE_CACHE_TTL = int(os.getenv('AI_RESPONSE_CACHE_TTL', 86400))
+    REDIS_URL = os.getenv('REDIS_URL')
+    print(f"[CONFIG]  AI Response Cache: {'Enabled' if AI_RESPONSE_CACHE_ENABLED else 'Disabled'} (TTL: {AI_RESPONSE_CACHE_TTL}s, Backend: {'Redis' if REDIS_URL else 'in-process'})")
+
+    # Completion-token ceiling of the configured model (gpt-3.5-turbo and gpt-35-turbo deployments cap at 4096)
+    AI_MAX_COMPLETION_TOKENS = int(os.getenv('AI_MAX_COMPLETION_TOKENS', 4096))
+    print(f"[CONFIG]  AI Max Completion Tokens: {AI_MAX_COMPLETION_TOKENS}")
+
+    # Context window of the configured model in tokens (0 = infer from the model name)
+    AI_CONTEXT_WINDOW_TOKENS = int(os.getenv('AI_CONTEXT_WINDOW_TOKENS', 0))
+    print(f"[CONFIG]  AI Context Window Tokens: {AI_CONTEXT_WINDOW_TOKENS or 'from model name'}")
+
+    # Opt-in rule-based story extraction for trivial requirements (skips the AI call, output is templated)
+    STORY_FAST_PATH_ENABLED = os.getenv('STORY_FAST_PATH_ENABLED', 'false').lower() == 'true'
+    print(f"[CONFIG]  Story Extraction Fast Path: {'Enabled' if STORY_FAST_PATH_ENABLED else 'Disabled'}")
+
     @classmethod
     def get_available_work_item_types(cls):
         """Get available work item types for configuration"""
@@ -303,6 +326,9 @@ class Settings:
         except Exception as e:
             print(f"[CONFIG]  Failed to reload OPENAI_RETRY_DELAY, keeping current value: {cls.OPENAI_RETRY_DELAY} - Error: {e}")
         
+        cls.AI_MAX_COMPLETION_TOKENS = int(os.getenv('AI_MAX_COMPLETION_TOKENS', 4096))
+        cls.AI_CONTEXT_WINDOW_TOKENS = int(os.getenv('AI_CONTEXT_WINDOW_TOKENS', 0))
+        
         print(f"[CONFIG]  Reloaded - REQUIREMENT_TYPE: {cls.REQUIREMENT_TYPE}")
         print(f"[CONFIG]  Reloaded - USER_STORY_TYPE: {cls.USER_STORY_TYPE}")
         print(f"[CONFIG]  Reloaded - STORY_EXTRACTION_TYPE: {cls.STORY_EXTRACTION_TYPE}")
@@ -6,6 +6,8 @@ Includes token usage tracking for the Token Dashboard
 
 from openai import OpenAI, AzureOpenAI
 from config.settings import Settings
+from src.rate_limiter import AIRateLimiter
+import threading
 import time
 import logging
 
@@ -25,6 +27,25 @@ def _get_tracker():
             logger.warning(f"Token tracker not available: {e}")
     return _token_tracker
 
+# Rate limiter is shared process-wide because provider limits apply per account, not per client
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+def _get_rate_limiter() -> AIRateLimiter:
+    """Lazy initialization of the shared AI rate limiter"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = AIRateLimiter(
+                    requests_per_minute=getattr(Settings, 'AI_RATE_LIMIT_RPM', 0),
+                    tokens_per_minute=getattr(Settings, 'AI_RATE_LIMIT_TPM', 0)
+                )
+    return _rate_limiter
+
+# Client errors that another attempt cannot fix (timeouts, conflicts and rate limits are still retried)
+_NON_RETRYABLE_STATUS_CODES = frozenset(range(400, 500)) - {408, 409, 429}
+
 class AIClientFactory:
     """Factory class for creating AI clients with provider abstraction"""
     
@@ -53,10 +74,54 @@ class BaseAIClient:
         self.provider_name = "UNKNOWN"
         self.model_name = "unknown"
     
-    def chat_completion(self, messages, temperature=0.7, max_tokens=2000):
-        """Abstract method for chat completion"""
+    def chat_completion(self, messages, temperature=0.7, max_tokens=2000, prompt_cache_key=None):
+        """
+        Abstract method for chat completion.
+        prompt_cache_key groups requests sharing a static prompt prefix so the provider can
+        route them to the same prompt cache; providers without support ignore it.
+        """
         raise NotImplementedError
     
+    def chat_completion_stream(self, messages, temperature=0.7, max_tokens=2000, prompt_cache_key=None):
+        """
+        Streaming chat completion: yields response text chunks as the model produces them.
+        Only opening the stream is retried; once chunks have been yielded a failure propagates.
+        """
+        def _open_stream():
+            self._throttle(messages, max_tokens)
+            logger.info(f"📡 {self.provider_name}: Opening streaming chat completion with model '{self._request_model()}'")
+            return self.client.chat.completions.create(
+                model=self._request_model(),
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                extra_body=self._request_extra_body(prompt_cache_key)
+            )
+        
+        for chunk in self._retry_request(_open_stream):
+            if chunk.choices:
+                content = chunk.choices[0].delta.content
+                if content:
+                    yield content
+    
+    def _request_model(self):
+        """Model identifier sent with each request"""
+        return self.model
+    
+    def _request_extra_body(self, prompt_cache_key):
+        """Provider-specific request fields; only OpenAI accepts prompt_cache_key"""
+        return None
+    
+    def _throttle(self, messages, max_tokens):
+        """Wait for rate-limit capacity before sending a request (no-op when no limits are configured)"""
+        limiter = _get_rate_limiter()
+        if not limiter.enabled:
+            return
+        # Providers count max_tokens against TPM up front; prompt tokens are estimated at ~4 chars/token
+        prompt_chars = sum(len(msg.get('content') or '') for msg in messages)
+        limiter.acquire(prompt_chars // 4 + max_tokens)
+    
     def track_usage(self, messages, response_text, call_type="general", 
                     toon_enabled=True, success=True, error_message="",
                     story_id="", story_title=""):
@@ -98,6 +163,10 @@ class BaseAIClient:
                 return func(*args, **kwargs)
             except Exception as e:
                 last_exception = e
+                status_code = getattr(e, 'status_code', None)
+                if status_code in _NON_RETRYABLE_STATUS_CODES:
+                    logger.error(f"AI request rejected with status {status_code}, not retrying: {e}")
+                    raise
                 if attempt < self.max_retries - 1:
                     wait_time = self.retry_delay * (2 ** attempt)
                     logger.warning(f"AI request failed (attempt {attempt + 1}/{self.max_retries}), retrying in {wait_time}s: {e}")
@@ -118,16 +187,18 @@ class OpenAIClient(BaseAIClient):
         self.model_name = self.model
         logger.info(f"Initialized OpenAI client with model: {self.model}")
     
-    def chat_completion(self, messages, temperature=0.7, max_tokens=2000):
+    def chat_completion(self, messages, temperature=0.7, max_tokens=2000, prompt_cache_key=None):
         """Make chat completion request to OpenAI"""
         def _make_request():
+            self._throttle(messages, max_tokens)
             logger.info(f"🔶 OpenAI: Making chat completion request with model '{self.model}'")
             
             response = self.client.chat.completions.create(
                 model=self.model,
                 messages=messages,
                 temperature=temperature,
-                max_tokens=max_tokens
+                max_tokens=max_tokens,
+                extra_body=self._request_extra_body(prompt_cache_key)
             )
             
             result = response.choices[0].message.content.strip()
@@ -135,6 +206,9 @@ class OpenAIClient(BaseAIClient):
             return result
         
         return self._retry_request(_make_request)
+    
+    def _request_extra_body(self, prompt_cache_key):
+        return {"prompt_cache_key": prompt_cache_key} if prompt_cache_key else None
 
 class AzureOpenAIClient(BaseAIClient):
     """Client for Azure OpenAI Service"""
@@ -152,9 +226,10 @@ class AzureOpenAIClient(BaseAIClient):
         self.model_name = self.model
         logger.info(f"Initialized Azure OpenAI client with deployment: {self.deployment_name}")
     
-    def chat_completion(self, messages, temperature=0.7, max_tokens=2000):
+    def chat_completion(self, messages, temperature=0.7, max_tokens=2000, prompt_cache_key=None):
         """Make chat completion request to Azure OpenAI"""
         def _make_request():
+            self._throttle(messages, max_tokens)
             logger.info(f"🔷 Azure OpenAI: Making chat completion request to deployment '{self.deployment_name}'")
             logger.debug(f"🔷 Azure OpenAI: Endpoint={Settings.AZURE_OPENAI_ENDPOINT}, API Version={Settings.AZURE_OPENAI_API_VERSION}")
             
@@ -170,11 +245,41 @@ class AzureOpenAIClient(BaseAIClient):
             return result
         
         return self._retry_request(_make_request)
+    
+    def _request_model(self):
+        return self.deployment_name  # Azure routes by deployment name
+
+_ai_client = None
+_ai_client_config = None
+_ai_client_lock = threading.Lock()
+
+def _client_config():
+    """Settings the client is built from; a change (e.g. Settings.reload_config) triggers a rebuild"""
+    return (
+        Settings.AI_SERVICE_PROVIDER,
+        Settings.OPENAI_API_KEY, Settings.OPENAI_MODEL,
+        Settings.AZURE_OPENAI_API_KEY, Settings.AZURE_OPENAI_ENDPOINT, Settings.AZURE_OPENAI_API_VERSION,
+        Settings.AZURE_OPENAI_DEPLOYMENT_NAME, Settings.AZURE_OPENAI_MODEL,
+        Settings.GITHUB_TOKEN, Settings.GITHUB_API_BASE, Settings.GITHUB_MODEL,
+        Settings.OPENAI_MAX_RETRIES, Settings.OPENAI_RETRY_DELAY
+    )
 
 # Convenience function for backward compatibility
 def get_ai_client():
-    """Get AI client instance based on current configuration"""
-    return AIClientFactory.create_client()
+    """
+    Get the shared AI client instance based on current configuration.
+    Clients are stateless after construction, so one instance (and its HTTP connection pool)
+    is reused by every extractor instead of reconnecting per story; it is rebuilt when the
+    provider settings change.
+    """
+    global _ai_client, _ai_client_config
+    config = _client_config()
+    if _ai_client is None or _ai_client_config != config:
+        with _ai_client_lock:
+            if _ai_client is None or _ai_client_config != config:
+                _ai_client = AIClientFactory.create_client()
+                _ai_client_config = config
+    return _ai_client
 
 class GitHubModelsClient(BaseAIClient):
     """Client for GitHub Models (free tier with GitHub PAT)"""
@@ -191,9 +296,10 @@ class GitHubModelsClient(BaseAIClient):
         logger.info(f"Initialized GitHub Models client with model: {self.model}")
         logger.info(f"Using endpoint: {Settings.GITHUB_API_BASE}")
     
-    def chat_completion(self, messages, temperature=0.7, max_tokens=2000):
+    def chat_completion(self, messages, temperature=0.7, max_tokens=2000, prompt_cache_key=None):
         """Make chat completion request to GitHub Models"""
         def _make_request():
+            self._throttle(messages, max_tokens)
             logger.info(f"🐙 GitHub Models: Making chat completion request with model '{self.model}'")
             
             response = self.client.chat.completions.create(
@@ -0,0 +1,71 @@
+"""
+Client-side rate limiting for AI calls
+Queues requests locally with token buckets sized to the account's RPM/TPM limits,
+so bursts wait briefly instead of bouncing off the provider with 429 errors
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Thread-safe token bucket that blocks callers until enough capacity is available"""
+
+    def __init__(self, capacity: float, refill_per_sec: float):
+        self.capacity = float(capacity)
+        self.refill_per_sec = float(refill_per_sec)
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """Add tokens accrued since the last refill (caller must hold the lock)"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.refill_per_sec)
+        self._last_refill = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Take `tokens` from the bucket, sleeping until they are available.
+        Requests larger than the bucket are clamped to its capacity.
+        Returns the total time spent waiting, in seconds.
+        """
+        tokens = min(float(tokens), self.capacity)
+        waited = 0.0
+
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait_time = (tokens - self._tokens) / self.refill_per_sec
+
+            time.sleep(wait_time)
+            waited += wait_time
+
+
+class AIRateLimiter:
+    """Pair of token buckets enforcing requests-per-minute and tokens-per-minute limits"""
+
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        self.rpm_bucket = TokenBucket(requests_per_minute, requests_per_minute / 60.0) if requests_per_minute > 0 else None
+        self.tpm_bucket = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0) if tokens_per_minute > 0 else None
+
+    @property
+    def enabled(self) -> bool:
+        return self.rpm_bucket is not None or self.tpm_bucket is not None
+
+    def acquire(self, estimated_tokens: int) -> float:
+        """Block until one request and `estimated_tokens` tokens may be sent; returns seconds waited"""
+        waited = 0.0
+        if self.rpm_bucket is not None:
+            waited += self.rpm_bucket.acquire(1)
+        if self.tpm_bucket is not None:
+            waited += self.tpm_bucket.acquire(estimated_tokens)
+        if waited > 0:
+            logger.info(f"⏳ Rate limiter: waited {waited:.2f}s before AI request (~{estimated_tokens} tokens)")
+        return waited
@@ -0,0 +1,111 @@
+"""
+Exact-match response cache for AI calls
+Stores raw AI responses keyed by a hash of the prompts, model and temperature, so re-running
+the same requirement or story (retries, test runs, CI) skips the AI call entirely.
+Uses Redis when REDIS_URL is configured (shared across processes), otherwise an in-process LRU.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from config.settings import Settings
+
+try:
+    import redis
+except ImportError:  # redis is optional; the in-process cache is used instead
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """Key/value cache for raw AI responses with a time-to-live"""
+
+    KEY_PREFIX = "stax:ai-response:"
+    MAX_MEMORY_ENTRIES = 512
+
+    def __init__(self, redis_url: Optional[str] = None, ttl: int = 86400):
+        self.ttl = ttl
+        self._redis = None
+        self._memory: OrderedDict = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+        if redis_url:
+            if redis is None:
+                logger.warning("REDIS_URL is set but the redis package is not installed, using in-process cache")
+            else:
+                try:
+                    self._redis = redis.Redis.from_url(redis_url)
+                    self._redis.ping()
+                    logger.info("ResponseCache: using Redis backend")
+                except Exception as e:
+                    logger.warning(f"ResponseCache: Redis unavailable ({e}), using in-process cache")
+                    self._redis = None
+
+    @staticmethod
+    def make_key(system_prompt: str, user_prompt: str, model: str, temperature: float) -> str:
+        """Build a deterministic cache key for an AI request"""
+        digest = hashlib.blake2b(digest_size=20)
+        for part in (model, repr(temperature), system_prompt, user_prompt):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for `key`, or None on a miss"""
+        if self._redis is not None:
+            try:
+                value = self._redis.get(self.KEY_PREFIX + key)
+                return value.decode("utf-8") if value is not None else None
+            except Exception as e:
+                logger.warning(f"ResponseCache: Redis get failed: {e}")
+                return None
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str):
+        """Store a response under `key` for the configured TTL"""
+        if self._redis is not None:
+            try:
+                self._redis.setex(self.KEY_PREFIX + key, self.ttl, value)
+            except Exception as e:
+                logger.warning(f"ResponseCache: Redis set failed: {e}")
+            return
+
+        with self._lock:
+            self._memory[key] = (time.monotonic() + self.ttl, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.MAX_MEMORY_ENTRIES:
+                self._memory.popitem(last=False)
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Get the shared ResponseCache, or None when response caching is disabled"""
+    global _response_cache
+    if not getattr(Settings, 'AI_RESPONSE_CACHE_ENABLED', False):
+        return None
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache(
+                    redis_url=getattr(Settings, 'REDIS_URL', None),
+                    ttl=getattr(Settings, 'AI_RESPONSE_CACHE_TTL', 86400)
+                )
+    return _response_cache
@@ -1,18 +1,205 @@
+import asyncio
+import functools
 import json
 import re
 import time
 import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
 from typing import List
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib json module
+    orjson = None
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional; fall back to a character-based estimate
+    tiktoken = None
+
 from config.settings import Settings
 from src.models import Requirement, StoryExtractionResult, UserStory
-from src.models_enhanced import EnhancedUserStory
+from src.models_enhanced import EnhancedUserStory, StoryComplexityAnalysis, ComplexityFactor, ComplexityLevel
 from src.enhanced_story_creator import EnhancedStoryCreator
 from src.ai_client import get_ai_client
+from src.response_cache import ResponseCache, get_response_cache
+
+# Slotted dataclasses (no per-instance __dict__) need Python 3.10+; older versions get regular ones
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+# Upper bound on concurrent complexity-analysis calls per requirement
+_MAX_STORY_WORKERS = 8
+
+# Completion budget reserved for each story extraction call
+_STORY_MAX_TOKENS = 3000
+_STORY_TEMPERATURE = 0.3
+
+# Context window sizes by model name (matched by substring, most specific first);
+# Settings.AI_CONTEXT_WINDOW_TOKENS overrides this for models or deployments not listed here
+_MODEL_CONTEXT_LIMITS = {
+    'gpt-4.1': 1047576,
+    'gpt-4o': 128000,
+    'gpt-4-turbo': 128000,
+    'gpt-4-32k': 32768,
+    'gpt-4': 8192,
+    'gpt-35-turbo': 16385,
+    'gpt-3.5-turbo': 16385,
+}
+_DEFAULT_CONTEXT_LIMIT = 8192
+
+# Paragraph boundaries used to split oversize requirement descriptions (plain text or ADO HTML)
+_PARAGRAPH_SPLIT_RE = re.compile(r'\n\s*\n|</p>|</div>|(?:<br\s*/?>\s*){2,}', re.IGNORECASE)
+
+# Sentence boundaries (terminal punctuation followed by whitespace, so decimals like 2.5 stay intact)
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+# Whole-word indicators that a sentence states a business rule
+_RULE_INDICATOR_RE = re.compile(r'\b(?:must|should|shall|required|mandatory|optional|if|when|unless)\b', re.IGNORECASE)
+
+# Domain keywords; the first domain with at least two keyword hits wins, so order matters
+_DOMAIN_KEYWORDS = {
+    'e-commerce': ('shop', 'cart', 'order', 'payment', 'product', 'checkout', 'purchase', 'inventory'),
+    'banking': ('account', 'transfer', 'balance', 'transaction', 'loan', 'credit', 'debit', 'interest'),
+    'healthcare': ('patient', 'medical', 'appointment', 'prescription', 'diagnosis', 'treatment'),
+    'education': ('student', 'course', 'grade', 'assignment', 'enrollment', 'curriculum'),
+    'hrms': ('employee', 'payroll', 'leave', 'performance', 'attendance', 'recruitment'),
+    'crm': ('customer', 'lead', 'opportunity', 'contact', 'campaign', 'sales'),
+    'project_management': ('project', 'task', 'milestone', 'resource', 'timeline', 'gantt'),
+    'logistics': ('shipment', 'delivery', 'warehouse', 'tracking', 'route', 'fleet')
+}
+
+# Keyword alternations used to score story priority
+_HIGH_PRIORITY_RE = re.compile('critical|essential|must|required|security|login|payment')
+_MEDIUM_PRIORITY_RE = re.compile('should|important|workflow|process|management')
+_LOW_PRIORITY_RE = re.compile('nice to have|optional|enhancement|improvement')
+
+# Extracts the body of a markdown code fence (```json ... ```) wrapped around an AI response
+_FENCE_RE = re.compile(r'^\s*```(?:json)?\s*(.*?)\s*(?:```)?\s*$', re.DOTALL)
+
+
+def _has_keyword_hits(text: str, keywords, threshold: int) -> bool:
+    """Check whether at least `threshold` keywords occur in text, stopping as soon as the threshold is met"""
+    hits = 0
+    for keyword in keywords:
+        if keyword in text:
+            hits += 1
+            if hits >= threshold:
+                return True
+    return False
+
+
+def _json_loads(content: str):
+    """Parse JSON using orjson when available (raises a json.JSONDecodeError subclass on failure)"""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def _json_dumps_pretty(obj) -> str:
+    """Serialize an object as indented JSON using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2, default=str).decode()
+    return json.dumps(obj, indent=2, default=str)
+
+
+# Static instructions appended to every TOON extraction prompt
+_TOON_INSTRUCTIONS_BLOCK = """
+
+**Instructions:**
+1. Break into 2-6 stories based on complexity
+2. Each story = single functionality
+3. Independent & deliverable
+4. Clear AC (happy path + edge cases + errors)
+5. Size for 1-3 day dev effort
+
+Return JSON only."""
+
+# Static instructions and response format appended to every standard extraction prompt
+_RESPONSE_SCHEMA_BLOCK = """
+**Instructions:**
+1. Break down this requirement into 2-6 logical user stories based on complexity and scope
+2. Each story should be focused on a single piece of functionality
+3. Ensure stories are independent and deliverable
+4. Consider the domain context and stakeholders when crafting stories
+5. Write clear acceptance criteria that are testable and specific
+6. Include edge cases and error scenarios where relevant
+7. Consider non-functional requirements (performance, security, usability)
+
+**Story Quality Guidelines:**
+- Headlines should be specific and action-oriented
+- Descriptions should include both user value and technical context
+- Acceptance criteria should cover happy path, edge cases, and error scenarios
+- Stories should be sized for 1-3 day development efforts
+- Include relevant business rules and constraints
+
+**Required JSON Response Format:**
+{
+    "stories": [
+        {
+            "heading": "Specific, action-oriented title",
+            "description": "As a [specific user type], I want [specific goal] so that [clear benefit]",
+            "technical_context": "Technical details and implementation requirements",
+            "business_requirements": "Business rules, constraints, and requirements",
+            "acceptance_criteria": [
+                "Given [specific context/state] When [specific action] Then [specific outcome] And [additional outcomes]",
+                "Given [error condition] When [action] Then [error handling behavior]",
+                "Given [edge case] When [action] Then [expected behavior]"
+            ],
+            "priority": "High|Medium|Low",
+            "story_points": "1|2|3|5|8",
+            "dependencies": ["Other stories this depends on"],
+            "business_value": "Clear statement of business value"
+        }
+    ]
+}
+
+Return only valid JSON, no additional text.
+"""
+
+
+class _LazyJSON:
+    """Defers JSON serialization of a log argument until a handler actually formats the record"""
+    __slots__ = ('obj',)
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def __str__(self) -> str:
+        return _json_dumps_pretty(self.obj)
+
+
+@dataclass(**_DATACLASS_SLOTS)
+class StoryDraft:
+    """Story fields parsed from the AI response, before complexity analysis"""
+    heading: str
+    description: str = ""
+    technical_context: str = ""
+    business_requirements: str = ""
+    acceptance_criteria: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, story_data: dict) -> "StoryDraft":
+        """Build a draft from one entry of the AI response, ignoring unknown keys"""
+        acceptance_criteria = story_data.get("acceptance_criteria") or []
+        if isinstance(acceptance_criteria, str):
+            acceptance_criteria = acceptance_criteria.split("\n")
+        return cls(
+            heading=story_data["heading"],
+            description=story_data.get("description") or "",
+            technical_context=story_data.get("technical_context") or "",
+            business_requirements=story_data.get("business_requirements") or "",
+            acceptance_criteria=acceptance_criteria
+        )
+
 
 class StoryExtractor:
     """AI-powered extractor that analyzes requirements and creates enhanced user stories"""
     
+    # tiktoken encoders shared across instances, keyed by model name
+    _encoders: dict = {}
+    
     def __init__(self):
         Settings.validate()
         self.ai_client = get_ai_client()
@@ -36,22 +223,26 @@ class StoryExtractor:
     def extract_stories(self, requirement: Requirement, existing_stories: List[dict] = None) -> StoryExtractionResult:
         """Extract enhanced user stories from a requirement using AI, avoiding duplicates"""
         self.logger.info(f"Starting story extraction for requirement: {requirement.id}")
-        self.logger.debug(f"Requirement details: {json.dumps(requirement.__dict__, indent=2)}")
+        self.logger.debug("Requirement details: %s", _LazyJSON(requirement.__dict__))
         
         try:
             # Enhanced requirement analysis
             requirement_context = self._analyze_requirement_context(requirement)
-            self.logger.debug(f"Requirement context: {requirement_context}")
+            self.logger.debug("Requirement context: %s", requirement_context)
             
             # Get domain-specific guidelines
             domain_guidelines = self._get_domain_guidelines(requirement_context.get('domain', 'general'))
             
             # Analyze stakeholders and user personas
             stakeholders = self._identify_stakeholders(requirement)
-            self.logger.debug(f"Identified stakeholders: {stakeholders}")
+            self.logger.debug("Identified stakeholders: %s", stakeholders)
             
-            self.logger.debug("Analyzing requirement with AI...")
-            stories = self._analyze_requirement_with_ai(requirement, requirement_context, domain_guidelines, stakeholders)
+            if self._is_trivial_requirement(requirement_context):
+                self.logger.info(f"Trivial requirement {requirement.id}, using rule-based story template (no AI call)")
+                stories = self._template_stories(requirement, requirement_context, domain_guidelines)
+            else:
+                self.logger.debug("Analyzing requirement with AI...")
+                stories = self._analyze_requirement_in_chunks(requirement, requirement_context, domain_guidelines, stakeholders)
             self.logger.info(f"Found {len(stories)} potential stories")
             
             # Enhanced story validation and refinement
@@ -79,18 +270,152 @@ class StoryExtractor:
                 error_message=str(e)
             )
     
-    def _analyze_requirement_with_ai(self, requirement: Requirement, context: dict = None, domain_guidelines: dict = None, stakeholders: List[str] = None) -> List[EnhancedUserStory]:
-        """Use AI to analyze requirement and extract enhanced user stories with context awareness"""
+    async def extract_stories_async(self, requirement: Requirement, existing_stories: List[dict] = None) -> StoryExtractionResult:
+        """Async variant of extract_stories; runs the blocking extraction in a worker thread"""
+        return await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(self.extract_stories, requirement, existing_stories)
+        )
+    
+    async def extract_many(self, requirements: List[Requirement], existing_stories: List[dict] = None, concurrency: int = 8) -> List[StoryExtractionResult]:
+        """Extract stories for several requirements concurrently, at most `concurrency` at a time"""
+        semaphore = asyncio.Semaphore(concurrency)
         
-        # Use TOON-optimized prompt (TOON is always enabled)
+        async def _extract(requirement: Requirement) -> StoryExtractionResult:
+            async with semaphore:
+                return await self.extract_stories_async(requirement, existing_stories)
+        
+        return await asyncio.gather(*(_extract(requirement) for requirement in requirements))
+    
+    def _is_trivial_requirement(self, context: dict) -> bool:
+        """Check whether a requirement is small and simple enough for the rule-based fast path"""
+        return (
+            Settings.STORY_FAST_PATH_ENABLED and
+            context.get('complexity') == 'low' and
+            context.get('scope') == 'small' and
+            len(context.get('functional_areas', [])) <= 1
+        )
+    
+    def _template_stories(self, requirement: Requirement, context: dict, domain_guidelines: dict) -> List[EnhancedUserStory]:
+        """Build a single canonical story for a trivial requirement without calling the AI"""
+        persona = domain_guidelines.get('common_personas', ['User'])[0].lower()
+        title = requirement.title.strip()
+        
+        description = f"As a {persona}, I want to {title[:1].lower()}{title[1:]} so that I can complete my task without extra effort"
+        if requirement.description.strip():
+            description += f"<br><br><strong>Technical Context:</strong><br>{requirement.description.strip()}"
+        if context.get('business_rules'):
+            description += f"<br><br><strong>Business Requirements:</strong><br>{'<br>'.join(context['business_rules'])}"
+        
+        acceptance_criteria = [
+            f"Given I am a {persona} When I use \"{title}\" Then the system behaves as described in the requirement",
+            f"Given invalid or incomplete input When I use \"{title}\" Then a clear validation message is shown and no changes are saved",
+            f"Given an unexpected failure When I use \"{title}\" Then an error message is shown and the system remains in a consistent state"
+        ]
+        
+        complexity_analysis = StoryComplexityAnalysis(
+            overall_complexity=ComplexityLevel.LOW,
+            story_points=1,
+            factors=[
+                ComplexityFactor(
+                    name="Rule-based Assessment",
+                    assessment=ComplexityLevel.LOW,
+                    impact="Small, low-complexity requirement with a single functional area"
+                )
+            ],
+            rationale="Generated from the rule-based template for trivial requirements"
+        )
+        
+        return [EnhancedUserStory(
+            heading=title[:80],
+            description=description,
+            acceptance_criteria=acceptance_criteria,
+            complexity_analysis=complexity_analysis
+        )]
+    
+    def _analyze_requirement_in_chunks(self, requirement: Requirement, context: dict = None, domain_guidelines: dict = None, stakeholders: List[str] = None) -> List[EnhancedUserStory]:
+        """Analyze a requirement with AI, splitting its description by paragraph if the prompt would not fit the model's context window"""
         prompt = self._build_toon_extraction_prompt(requirement, context, domain_guidelines, stakeholders)
+        system_prompt = self._get_toon_system_prompt(context, domain_guidelines)
+        input_tokens = self._count_tokens(prompt) + self._count_tokens(system_prompt)
+        context_limit = self._get_context_limit()
+        
+        if input_tokens + _STORY_MAX_TOKENS <= context_limit:
+            return self._analyze_requirement_with_ai(
+                requirement, context, domain_guidelines, stakeholders, prompt=prompt, system_prompt=system_prompt
+            )
+        
+        paragraphs = [p for p in _PARAGRAPH_SPLIT_RE.split(requirement.description) if p.strip()]
+        if len(paragraphs) < 2:
+            raise Exception(
+                f"Requirement is too large for the model context window "
+                f"({input_tokens} input tokens + {_STORY_MAX_TOKENS} completion tokens > {context_limit})"
+            )
+        
+        self.logger.info(
+            f"Requirement {requirement.id} needs ~{input_tokens} input tokens (limit {context_limit}), "
+            f"splitting {len(paragraphs)} paragraphs into two chunks"
+        )
+        middle = len(paragraphs) // 2
+        stories = []
+        for chunk in (paragraphs[:middle], paragraphs[middle:]):
+            chunk_requirement = requirement.model_copy(update={'description': "\n\n".join(chunk)})
+            stories.extend(self._analyze_requirement_in_chunks(chunk_requirement, context, domain_guidelines, stakeholders))
+        return stories
+    
+    def _count_tokens(self, text: str) -> int:
+        """Count prompt tokens with tiktoken when available, otherwise estimate conservatively (~3 chars per token)"""
+        encoder = self._get_encoder()
+        if encoder is not None:
+            return len(encoder.encode(text))
+        return len(text) // 3 + 1
+    
+    def _get_encoder(self):
+        """Return the cached tiktoken encoder for the active model, or None if tiktoken is unavailable"""
+        if tiktoken is None:
+            return None
+        model = getattr(self.ai_client, 'model_name', None) or Settings.OPENAI_MODEL
+        if model not in StoryExtractor._encoders:
+            try:
+                try:
+                    encoder = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    encoder = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                self.logger.warning(f"tiktoken encoder unavailable for model '{model}', using estimate: {e}")
+                encoder = None
+            StoryExtractor._encoders[model] = encoder
+        return StoryExtractor._encoders[model]
+    
+    def _get_context_limit(self) -> int:
+        """Return the context window size (in tokens) of the active model"""
+        configured_limit = getattr(Settings, 'AI_CONTEXT_WINDOW_TOKENS', 0)
+        if configured_limit:
+            return configured_limit
+        model = (getattr(self.ai_client, 'model_name', None) or Settings.OPENAI_MODEL).lower()
+        for name, limit in _MODEL_CONTEXT_LIMITS.items():
+            if name in model:
+                return limit
+        return _DEFAULT_CONTEXT_LIMIT
+    
+    def _analyze_requirement_with_ai(self, requirement: Requirement, context: dict = None, domain_guidelines: dict = None, stakeholders: List[str] = None,
+                                     prompt: str = None, system_prompt: str = None) -> List[EnhancedUserStory]:
+        """
+        Use AI to analyze requirement and extract enhanced user stories with context awareness.
+        Callers that already built the prompts (to measure them) pass them in to avoid rebuilding.
+        """
+        
+        # Use TOON-optimized prompt (TOON is always enabled)
+        if prompt is None:
+            prompt = self._build_toon_extraction_prompt(requirement, context, domain_guidelines, stakeholders)
+        if system_prompt is None:
+            system_prompt = self._get_toon_system_prompt(context, domain_guidelines)
         
         try:
             # Build messages for AI call with TOON-optimized system prompt
             messages = [
                 {
                     "role": "system",
-                    "content": self._get_toon_system_prompt(context, domain_guidelines)
+                    "content": system_prompt
                 },
                 {
                     "role": "user", 
@@ -98,83 +423,71 @@ class StoryExtractor:
                 }
             ]
             
-            # Use the unified AI client for chat completion with enhanced system prompt
-            content = self.ai_client.chat_completion(
-                messages=messages,
-                temperature=0.3,
-                max_tokens=3000  # Increased token limit for more detailed stories
-            )
-            
-            # Log the raw AI response for debugging
-            self.logger.debug(f"Raw AI response: {repr(content)}")
-            self.logger.debug(f"AI response length: {len(content)} characters")
-            
-            # Check if response is empty
-            if not content or not content.strip():
-                raise Exception("AI returned empty response")
+            # Reuse a cached response for identical prompts when response caching is enabled
+            response_cache = get_response_cache()
+            cache_key = None
+            content = None
+            if response_cache is not None:
+                cache_key = ResponseCache.make_key(
+                    messages[0]["content"], prompt, getattr(self.ai_client, 'model_name', ''), _STORY_TEMPERATURE
+                )
+                content = response_cache.get(cache_key)
+                if content is not None:
+                    self.logger.info(f"Using cached AI response for requirement {requirement.id}")
             
-            # Track token usage for the dashboard
-            self.ai_client.track_usage(
-                messages=messages,
-                response_text=content,
-                call_type="story_extraction",
-                toon_enabled=self.use_toon,  # TOON is always enabled
-                success=True,
-                story_id=str(requirement.id),
-                story_title=requirement.title
-            )
+            if content is None:
+                # Use the unified AI client for chat completion with enhanced system prompt
+                content = self.ai_client.chat_completion(
+                    messages=messages,
+                    temperature=_STORY_TEMPERATURE,
+                    max_tokens=_STORY_MAX_TOKENS  # Increased token limit for more detailed stories
+                )
+                
+                # Log the raw AI response for debugging
+                self.logger.debug("Raw AI response: %r", content)
+                self.logger.debug("AI response length: %d characters", len(content))
+                
+                # Check if response is empty
+                if not content or not content.strip():
+                    raise Exception("AI returned empty response")
+                
+                # Track token usage for the dashboard
+                self.ai_client.track_usage(
+                    messages=messages,
+                    response_text=content,
+                    call_type="story_extraction",
+                    toon_enabled=self.use_toon,  # TOON is always enabled
+                    success=True,
+                    story_id=str(requirement.id),
+                    story_title=requirement.title
+                )
             
             # Clean up the response (remove markdown code blocks if present)
-            content = content.strip()
-            if content.startswith('```json'):
-                content = content[7:]  # Remove ```json
-            if content.startswith('```'):
-                content = content[3:]   # Remove ```
-            if content.endswith('```'):
-                content = content[:-3]  # Remove trailing ```
-            content = content.strip()
+            fence_match = _FENCE_RE.match(content)
+            content = fence_match.group(1) if fence_match else content.strip()
             
-            self.logger.debug(f"Cleaned AI response: {repr(content[:200])}...")
+            self.logger.debug("Cleaned AI response: %r...", content[:200])
             
             # Parse JSON response
             try:
-                stories_data = json.loads(content)
+                stories_data = _json_loads(content)
             except json.JSONDecodeError as e:
                 self.logger.error(f"JSON parse error: {e}")
                 self.logger.error(f"Failed to parse response: {content[:500]}...")  # Log first 500 chars
                 raise Exception(f"Failed to parse AI response as JSON: {str(e)}")
             
-            # Convert to EnhancedUserStory objects
-            stories = []
-            for story_data in stories_data.get("stories", []):
-                # Handle acceptance criteria format
-                acceptance_criteria = story_data.get("acceptance_criteria", [])
-                if isinstance(acceptance_criteria, str):
-                    acceptance_criteria = acceptance_criteria.split("\n")
-                
-                # Combine description, technical_context, and business_requirements
-                description = story_data.get("description", "")
-                technical_context = story_data.get("technical_context", "")
-                business_requirements = story_data.get("business_requirements", "")
-                
-                # Format the complete description with HTML formatting
-                full_description = description
-                if technical_context:
-                    full_description += f"<br><br><strong>Technical Context:</strong><br>{technical_context}"
-                if business_requirements:
-                    full_description += f"<br><br><strong>Business Requirements:</strong><br>{business_requirements}"
-                
-                # Create an enhanced story with complexity analysis and additional metadata
-                story = self.story_creator.create_enhanced_story(
-                    heading=story_data["heading"],
-                    description=full_description,
-                    acceptance_criteria=acceptance_criteria
-                )
-                
-                # Note: story_points is automatically calculated and stored in story.complexity_analysis.story_points
-                # by the enhanced_story_creator during complexity analysis
-                
-                stories.append(story)
+            # Only cache responses that parsed successfully
+            if cache_key is not None:
+                response_cache.set(cache_key, content)
+            
+            # Convert to EnhancedUserStory objects; each story's complexity analysis is an
+            # independent AI round trip, so build them concurrently
+            drafts = [StoryDraft.from_dict(story_data) for story_data in stories_data.get("stories", [])]
+            if len(drafts) > 1:
+                with ThreadPoolExecutor(max_workers=min(_MAX_STORY_WORKERS, len(drafts))) as executor:
+                    stories = list(executor.map(self._build_one_story, drafts))
+            else:
+                stories = [self._build_one_story(draft) for draft in drafts]
             
             self.logger.info(f"Successfully created {len(stories)} enhanced user stories")
             return stories
@@ -184,6 +497,24 @@ class StoryExtractor:
         except Exception as e:
             raise Exception(f"AI analysis failed: {str(e)}")
     
+    def _build_one_story(self, draft: StoryDraft) -> EnhancedUserStory:
+        """Build a single EnhancedUserStory (with complexity analysis) from a parsed story draft"""
+        # Format the complete description with HTML formatting
+        full_description = draft.description
+        if draft.technical_context:
+            full_description += f"<br><br><strong>Technical Context:</strong><br>{draft.technical_context}"
+        if draft.business_requirements:
+            full_description += f"<br><br><strong>Business Requirements:</strong><br>{draft.business_requirements}"
+        
+        # Create an enhanced story with complexity analysis and additional metadata
+        # Note: story_points is automatically calculated and stored in story.complexity_analysis.story_points
+        # by the enhanced_story_creator during complexity analysis
+        return self.story_creator.create_enhanced_story(
+            heading=draft.heading,
+            description=full_description,
+            acceptance_criteria=draft.acceptance_criteria
+        )
+    
     def _get_toon_system_prompt(self, context: dict = None, domain_guidelines: dict = None) -> str:
         """Get TOON-optimized system prompt (reduced token usage by ~50-60%)"""
         
@@ -224,117 +555,76 @@ Return valid JSON only."""
     def _build_toon_extraction_prompt(self, requirement: Requirement, context: dict = None, domain_guidelines: dict = None, stakeholders: List[str] = None) -> str:
         """Build TOON-optimized prompt (reduced token usage by ~50-60%)"""
         
-        prompt = f"""Extract user stories (TOON format):
+        parts = [f"""Extract user stories (TOON format):
 
 **Req Title:** {requirement.title}
 
-**Req Desc:** {requirement.description}"""
+**Req Desc:** {requirement.description}"""]
         
         # Add compact context
         if context:
-            prompt += f"\n\n**Ctx:** Dom:{context.get('domain','general')} | Cmplx:{context.get('complexity','med')} | Scope:{context.get('scope','med')}"
+            parts.append(f"\n\n**Ctx:** Dom:{context.get('domain','general')} | Cmplx:{context.get('complexity','med')} | Scope:{context.get('scope','med')}")
             if context.get('functional_areas'):
-                prompt += f" | Areas:{','.join(context.get('functional_areas', [])[:3])}"
+                parts.append(f" | Areas:{','.join(context.get('functional_areas', [])[:3])}")
         
         # Add compact stakeholders
         if stakeholders:
-            prompt += f"\n**Stakeholders:** {', '.join(stakeholders[:3])}"
+            parts.append(f"\n**Stakeholders:** {', '.join(stakeholders[:3])}")
         
-        prompt += """
-
-**Instructions:**
-1. Break into 2-6 stories based on complexity
-2. Each story = single functionality
-3. Independent & deliverable
-4. Clear AC (happy path + edge cases + errors)
-5. Size for 1-3 day dev effort
-
-Return JSON only."""
+        parts.append(_TOON_INSTRUCTIONS_BLOCK)
         
-        return prompt
+        return "".join(parts)
     
     def _build_extraction_prompt(self, requirement: Requirement, context: dict = None, domain_guidelines: dict = None, stakeholders: List[str] = None) -> str:
         """Build the prompt for AI analysis with enhanced context"""
         
-        base_prompt = f"""
+        parts = [f"""
 Please analyze the following requirement and extract user stories from it.
 
 **Requirement Title:** {requirement.title}
 
 **Requirement Description:** 
 {requirement.description}
-"""
+"""]
         
         # Add context information if available
         if context:
-            base_prompt += f"""
+            functional_areas = ', '.join(context.get('functional_areas', []))
+            technical_components = ', '.join(context.get('technical_components', []))
+            user_interactions = ', '.join(context.get('user_interactions', []))
+            data_entities = ', '.join(context.get('data_entities', []))
+            parts.append(f"""
 **Context Analysis:**
 - Domain: {context.get('domain', 'general')}
 - Complexity: {context.get('complexity', 'medium')}
 - Scope: {context.get('scope', 'medium')}
-- Functional Areas: {', '.join(context.get('functional_areas', []))}
-- Technical Components: {', '.join(context.get('technical_components', []))}
-- User Interactions: {', '.join(context.get('user_interactions', []))}
-- Data Entities: {', '.join(context.get('data_entities', []))}
-"""
+- Functional Areas: {functional_areas}
+- Technical Components: {technical_components}
+- User Interactions: {user_interactions}
+- Data Entities: {data_entities}
+""")
         
         # Add domain-specific guidelines
         if domain_guidelines:
-            base_prompt += f"""
+            personas = ', '.join(domain_guidelines.get('common_personas', []))
+            workflows = ', '.join(domain_guidelines.get('key_workflows', []))
+            critical_aspects = ', '.join(domain_guidelines.get('critical_aspects', []))
+            parts.append(f"""
 **Domain Guidelines:**
-- Common User Personas: {', '.join(domain_guidelines.get('common_personas', []))}
-- Key Workflows: {', '.join(domain_guidelines.get('key_workflows', []))}
-- Critical Aspects: {', '.join(domain_guidelines.get('critical_aspects', []))}
-"""
+- Common User Personas: {personas}
+- Key Workflows: {workflows}
+- Critical Aspects: {critical_aspects}
+""")
         
         # Add stakeholder information
         if stakeholders:
-            base_prompt += f"""
+            parts.append(f"""
 **Identified Stakeholders:** {', '.join(stakeholders)}
-"""
+""")
         
-        base_prompt += """
-**Instructions:**
-1. Break down this requirement into 2-6 logical user stories based on complexity and scope
-2. Each story should be focused on a single piece of functionality
-3. Ensure stories are independent and deliverable
-4. Consider the domain context and stakeholders when crafting stories
-5. Write clear acceptance criteria that are testable and specific
-6. Include edge cases and error scenarios where relevant
-7. Consider non-functional requirements (performance, security, usability)
-
-**Story Quality Guidelines:**
-- Headlines should be specific and action-oriented
-- Descriptions should include both user value and technical context
-- Acceptance criteria should cover happy path, edge cases, and error scenarios
-- Stories should be sized for 1-3 day development efforts
-- Include relevant business rules and constraints
-
-**Required JSON Response Format:**
-{
-    "stories": [
-        {
-            "heading": "Specific, action-oriented title",
-            "description": "As a [specific user type], I want [specific goal] so that [clear benefit]",
-            "technical_context": "Technical details and implementation requirements",
-            "business_requirements": "Business rules, constraints, and requirements",
-            "acceptance_criteria": [
-                "Given [specific context/state] When [specific action] Then [specific outcome] And [additional outcomes]",
-                "Given [error condition] When [action] Then [error handling behavior]",
-                "Given [edge case] When [action] Then [expected behavior]"
-            ],
-            "priority": "High|Medium|Low",
-            "story_points": "1|2|3|5|8",
-            "dependencies": ["Other stories this depends on"],
-            "business_value": "Clear statement of business value"
-        }
-    ]
-}
-
-Return only valid JSON, no additional text.
-"""
+        parts.append(_RESPONSE_SCHEMA_BLOCK)
         
-        return base_prompt
+        return "".join(parts)
     
     def _get_enhanced_system_prompt(self, context: dict = None, domain_guidelines: dict = None) -> str:
         """Get enhanced system prompt based on context"""
@@ -451,19 +741,8 @@ Provide response as valid JSON only. Ensure all stories are well-formed and foll
     
     def _detect_domain(self, text: str) -> str:
         """Detect the application domain for context-specific story generation"""
-        domains = {
-            'e-commerce': ['shop', 'cart', 'order', 'payment', 'product', 'checkout', 'purchase', 'inventory'],
-            'banking': ['account', 'transfer', 'balance', 'transaction', 'loan', 'credit', 'debit', 'interest'],
-            'healthcare': ['patient', 'medical', 'appointment', 'prescription', 'diagnosis', 'treatment'],
-            'education': ['student', 'course', 'grade', 'assignment', 'enrollment', 'curriculum'],
-            'hrms': ['employee', 'payroll', 'leave', 'performance', 'attendance', 'recruitment'],
-            'crm': ['customer', 'lead', 'opportunity', 'contact', 'campaign', 'sales'],
-            'project_management': ['project', 'task', 'milestone', 'resource', 'timeline', 'gantt'],
-            'logistics': ['shipment', 'delivery', 'warehouse', 'tracking', 'route', 'fleet']
-        }
-        
-        for domain, keywords in domains.items():
-            if sum(1 for keyword in keywords if keyword in text) >= 2:
+        for domain, keywords in _DOMAIN_KEYWORDS.items():
+            if _has_keyword_hits(text, keywords, 2):
                 return domain
         return 'general'
     
@@ -572,17 +851,10 @@ Provide response as valid JSON only. Ensure all stories are well-formed and foll
     
     def _extract_business_rules(self, requirement: Requirement) -> List[str]:
         """Extract business rules from the requirement"""
-        text = requirement.description.lower()
-        rule_indicators = ['must', 'should', 'shall', 'required', 'mandatory', 'optional', 'if', 'when', 'unless']
-        
-        sentences = text.split('.')
-        business_rules = []
+        sentences = _SENTENCE_SPLIT_RE.split(requirement.description)
+        business_rules = (sentence.strip() for sentence in sentences if _RULE_INDICATOR_RE.search(sentence))
         
-        for sentence in sentences:
-            if any(indicator in sentence for indicator in rule_indicators):
-                business_rules.append(sentence.strip())
-        
-        return business_rules[:3]  # Limit to top 3
+        return list(islice(business_rules, 3))  # Limit to top 3
     
     def _extract_nfr(self, text: str) -> List[str]:
         """Extract non-functional requirements"""
@@ -698,19 +970,13 @@ Provide response as valid JSON only. Ensure all stories are well-formed and foll
     
     def _prioritize_stories(self, stories: List[EnhancedUserStory], context: dict) -> List[EnhancedUserStory]:
         """Prioritize stories based on business value and dependencies"""
-        # Simple prioritization based on context
-        priority_keywords = {
-            'high': ['critical', 'essential', 'must', 'required', 'security', 'login', 'payment'],
-            'medium': ['should', 'important', 'workflow', 'process', 'management'],
-            'low': ['nice to have', 'optional', 'enhancement', 'improvement']
-        }
-        
+        # Simple prioritization based on context: each distinct keyword found scores 3/2/1 by level
         def get_priority_score(story: EnhancedUserStory) -> int:
             text = f"{story.heading} {story.description}".lower()
             
-            high_count = sum(1 for keyword in priority_keywords['high'] if keyword in text)
-            medium_count = sum(1 for keyword in priority_keywords['medium'] if keyword in text)
-            low_count = sum(1 for keyword in priority_keywords['low'] if keyword in text)
+            high_count = len(set(_HIGH_PRIORITY_RE.findall(text)))
+            medium_count = len(set(_MEDIUM_PRIORITY_RE.findall(text)))
+            low_count = len(set(_LOW_PRIORITY_RE.findall(text)))
             
             return high_count * 3 + medium_count * 2 + low_count * 1
         
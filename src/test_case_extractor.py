@@ -4,100 +4,357 @@ Test Case Extractor using AI to generate comprehensive test cases from user stor
 
 import json
 import logging
-from typing import List, Dict, Any
+import re
+from functools import lru_cache
+from itertools import islice
+from typing import List, Dict, Any, Iterator, Tuple
 
 from src.models import UserStory, TestCase, TestCaseExtractionResult
 from config.settings import Settings
 from src.ai_client import get_ai_client
+from src.response_cache import ResponseCache, get_response_cache
+
+try:
+    import ijson
+except ImportError:  # ijson is optional; streamed responses are then parsed once complete
+    ijson = None
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional; keyword context falls back to the compiled regexes
+    ahocorasick = None
+
+# System prompts are static, so they are built once at import time
+_SYSTEM_PROMPT_TOON = """QA Expert. Generate test cases using Token Oriented Object Notation (TOON).
+
+**TOON FORMAT:**
+- Use abbrev. for common terms
+- Compact structure
+- Remove redundant words
+- Key fields only
+
+**Abbreviations:**
+TC=TestCase, desc=description, exp=expected, prereq=prerequisites, pos=positive, neg=negative, 
+edge=edge_case, sec=security, perf=performance, steps=test_steps, prio=priority, 
+auth=authentication, val=validation, UI=user_interface, API=application_interface, 
+DB=database, max=maximum, min=minimum, req=required, opt=optional
+
+**Test Types:** pos|neg|edge|sec|perf|integ
+
+**Priorities:** Crit|High|Med|Low
+
+**Coverage Areas:**
+1. Happy path (pos scenarios) - PRIORITIZE: Generate 8-10 positive test cases
+2. Error handling (neg/edge) - Generate 3-4 negative test cases
+3. Boundaries (min/max limits) - Generate 2-3 edge cases
+4. Security (auth/authz) - Generate 1-2 security test cases
+5. Integration points
+6. Data validation
+
+**Output Format (JSON):**
+{
+  "tcs": [
+    {
+      "t": "Action Verb + Specific Target",
+      "desc": "Brief objective",
+      "type": "pos|neg|edge|sec",
+      "prio": "Crit|High|Med|Low",
+      "steps": ["1.Action+input", "2.Verify+criteria"],
+      "exp": "Clear outcome.",
+      "prereq": "Setup needs",
+      "data": {"valid":[],"invalid":[],"boundary":[]},
+      "auto": "High|Med|Low",
+      "time": "5m|15m|30m|1h"
+    }
+  ],
+  "cov": {
+    "func": ["area1","area2"],
+    "risk": ["high_risk1"]
+  }
+}
+
+**Title Rules:**
+- Start: Verify|Test|Check|Validate|Handle|Ensure
+- Be specific
+- No generic titles
+
+Generate practical, executable TCs with good coverage."""
+_SYSTEM_PROMPT_TOON_LEN = len(_SYSTEM_PROMPT_TOON)
+
+# Batch extraction: the system prompt addendum and per-request budgets
+_BATCH_SYSTEM_PROMPT_SUFFIX = """
+
+**BATCH MODE:**
+Multiple stories are given, each starting with ===STORY_<n>===.
+Gen TCs for EVERY story. Return ONE JSON object:
+{"results":[{"story_id":<n>,"tcs":[...]}]}
+Each "tcs" array uses the TC format above."""
+_BATCH_MAX_STORIES = 4
+_BATCH_MAX_PROMPT_TOKENS = 6000
+# Smallest completion share a story may get; batches are sized so the model's output limit covers it
+_BATCH_MIN_TOKENS_PER_STORY = 1500
+_TC_MAX_TOKENS_PER_STORY = 3000
+_TC_TEMPERATURE = 0.7
+
+# Namespace for cached parsed test cases in the shared response cache
+_TC_CACHE_KEY_PREFIX = "tc:"
+
+# Markdown fences, JS-style "a".repeat(n) calls and // comments the model sometimes emits
+_JSON_CLEAN_RE = re.compile(r'\A```json|```\Z|(?P<repeat>"a"\.repeat\(\d+\))|//[^\n]*')
+
+
+def _json_clean_replacement(match: re.Match) -> str:
+    """Replacement for _JSON_CLEAN_RE: repeat calls become a literal, everything else is dropped"""
+    return '"a" * 255' if match.lastgroup == 'repeat' else ''
+
+
+# TOON abbreviation mappings, shared by every parse.
+# Unknown types become "positive"; unknown priorities such as "High" pass through unchanged.
+_TOON_TYPE_MAP = {
+    "pos": "positive",
+    "neg": "negative",
+    "edge": "edge_case",
+    "sec": "security",
+    "perf": "performance",
+    "integ": "integration"
+}
+_TOON_PRIO_MAP = {
+    "Crit": "Critical",
+    "Med": "Medium"
+}
+
+# Fallback parser: "Test case: ...", "Title: ...", "TC 3 - ..." style title lines
+_TEST_CASE_TITLE_RE = re.compile(r'(?i)(?:test\s*case|title|tc\s*\d+)[:\-\s]*([^\n]+)')
+
+# Fallback parser: a title hint anywhere in the line (any case), and the prefix stripped from its start
+_FALLBACK_TITLE_HINT_RE = re.compile(r'title:|test:|tc|[1-5]\.', re.IGNORECASE)
+_FALLBACK_TITLE_PREFIX_RE = re.compile(r'Title:|Test:|TC|[1-5]\.')
+
+# Shared decoder; raw_decode parses the first JSON value and reports where it ended
+_JSON_DECODER = json.JSONDecoder()
+
+# Providers only cache prompt prefixes of at least this many tokens
+_PROVIDER_CACHE_MIN_TOKENS = 1024
+
+# Context extraction patterns, compiled once instead of on every story
+_USER_TYPE_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'(?:as an?|as a)\s+([a-zA-Z\s]+?)(?:,|\s+I)',
+    r'(?:user|customer|admin|manager|employee|student|patient)\w*',
+    r'(?:logged[\s-]?in|authenticated|authorized)\s+user'
+))
+_DATA_ELEMENT_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'\b(?:email|password|username|name|address|phone|date|amount|price|quantity)\b',
+    r'\b(?:id|code|number|reference|token|key)\b',
+    r'\b(?:status|type|category|level|priority)\b'
+))
+# Integration keywords use '.' for an optional space/hyphen separator
+_INTEGRATION_KEYWORDS = (
+    'api', 'service', 'database', 'external', 'third.party', 'integration',
+    'payment.gateway', 'notification', 'email', 'sms', 'webhook'
+)
+_INTEGRATION_NAMES = tuple(kw.replace('.', ' ') for kw in _INTEGRATION_KEYWORDS)
+_INTEGRATION_PATTERNS = tuple(
+    (name, re.compile(kw.replace('.', r'[\s\-]?'), re.IGNORECASE))
+    for name, kw in zip(_INTEGRATION_NAMES, _INTEGRATION_KEYWORDS)
+)
+# Security keywords match at the start of a word
+_SECURITY_KEYWORDS = (
+    'login', 'authentication', 'authorization', 'permission', 'access',
+    'secure', 'encrypt', 'privacy', 'gdpr', 'compliance', 'audit'
+)
+_SECURITY_PATTERNS = tuple((kw, re.compile(rf'\b{kw}\w*', re.IGNORECASE)) for kw in _SECURITY_KEYWORDS)
+
+# Domain keywords in priority order, fused into one alternation with a named group per domain
+_DOMAIN_KEYWORDS = {
+    'e-commerce': ('shop', 'cart', 'order', 'payment', 'product', 'checkout', 'purchase'),
+    'banking': ('account', 'transfer', 'balance', 'transaction', 'loan', 'credit'),
+    'healthcare': ('patient', 'medical', 'appointment', 'prescription', 'diagnosis'),
+    'education': ('student', 'course', 'grade', 'assignment', 'enrollment'),
+    'hrms': ('employee', 'payroll', 'leave', 'performance', 'attendance')
+}
+_DOMAIN_RE = re.compile('|'.join(
+    f'(?P<{domain.replace("-", "_")}>{"|".join(map(re.escape, keywords))})'
+    for domain, keywords in _DOMAIN_KEYWORDS.items()
+))  # matched against lowercased text, so no IGNORECASE needed
+_DOMAIN_PRIORITY = {domain.replace("-", "_"): rank for rank, domain in enumerate(_DOMAIN_KEYWORDS)}
+_DOMAIN_NAMES = tuple(_DOMAIN_KEYWORDS)
+
+# Separators accepted by '.' in integration keywords (the regex form is [\s\-]?)
+_KEYWORD_SEPARATORS = ('', ' ', '-', '\t', '\n', '\r', '\f', '\v')
+
+
+def _build_keyword_automaton():
+    """
+    Build one Aho-Corasick automaton over the domain, integration and security keywords.
+    Each word maps to (length, ((category, rank, word_start), ...)) where rank is the keyword's
+    position in its list and word_start marks keywords that must begin at a word boundary.
+    """
+    if ahocorasick is None:
+        return None
+    
+    entries: Dict[str, list] = {}
+    for rank, keywords in enumerate(_DOMAIN_KEYWORDS.values()):
+        for keyword in keywords:
+            entries.setdefault(keyword, []).append(('domain', rank, False))
+    for rank, keyword in enumerate(_INTEGRATION_KEYWORDS):
+        separators = _KEYWORD_SEPARATORS if '.' in keyword else ('',)
+        for separator in separators:
+            entries.setdefault(keyword.replace('.', separator), []).append(('integrations', rank, False))
+    for rank, keyword in enumerate(_SECURITY_KEYWORDS):
+        entries.setdefault(keyword, []).append(('security_aspects', rank, True))
+    
+    automaton = ahocorasick.Automaton()
+    for word, values in entries.items():
+        automaton.add_word(word, (len(word), tuple(values)))
+    automaton.make_automaton()
+    return automaton
+
+
+_KEYWORD_AUTOMATON = _build_keyword_automaton()
+
+# Static instruction block opening each user prompt; keeping it ahead of the story text
+# extends the prefix that provider prompt caches can reuse across stories
+_PROMPT_PREAMBLE_TOON = """Gen TCs for story (TOON format):
+
+**Focus:**
+1. Biz-critical scenarios
+2. User journeys (diff personas)
+3. High-risk failures
+4. Data integrity
+5. Integration pts
+6. Error recovery
+7. Perf boundaries
+
+**TC Distribution (Min 15-18 TCs):**
+- Pos: 8-10 (happy path, user journeys, main flows)
+- Neg: 3-4 (error handling, invalid inputs)
+- Edge: 2-3 (boundaries, limits)
+- Sec: 1-2 (auth/authz if relevant)
+
+Gen comprehensive TCs with strong pos coverage."""
+
+
+@lru_cache(maxsize=1)
+def _get_settings() -> Settings:
+    """Shared Settings instance for all extractors"""
+    return Settings()
+
+
+def _completion_token_limit() -> int:
+    """Completion-token ceiling of the configured model"""
+    return getattr(Settings, 'AI_MAX_COMPLETION_TOKENS', 4096)
+
+
+def _provider_log_messages() -> tuple:
+    """Provider/model startup log lines for the current Settings"""
+    ai_provider = getattr(Settings, 'AI_SERVICE_PROVIDER', 'OPENAI')
+    messages = [
+        f"🤖 TestCaseExtractor: Initialized with AI provider '{ai_provider}'",
+        "📊 TOON Mode: ALWAYS ENABLED (Token Optimization Mandatory)"
+    ]
+    if ai_provider == 'AZURE_OPENAI':
+        deployment = getattr(Settings, 'AZURE_OPENAI_DEPLOYMENT_NAME', 'Unknown')
+        messages.append(f"🔷 TestCaseExtractor: Using Azure OpenAI deployment '{deployment}'")
+    else:
+        model = getattr(Settings, 'OPENAI_MODEL', 'Unknown')
+        messages.append(f"🔶 TestCaseExtractor: Using OpenAI model '{model}'")
+    return tuple(messages)
 
 
 class TestCaseExtractor:
     """Extracts test cases from user stories using AI"""
 
     def __init__(self, use_toon: bool = None):
-        self.settings = Settings()
+        self.settings = _get_settings()
         self.ai_client = get_ai_client()
         self.logger = logging.getLogger(__name__)
         # TOON is ALWAYS enabled - no API calls without token optimization
         self.use_toon = True  # Forced to True - TOON is mandatory for all API calls
         
         # Log which AI service is being used
-        ai_provider = getattr(Settings, 'AI_SERVICE_PROVIDER', 'OPENAI')
-        self.logger.info(f"🤖 TestCaseExtractor: Initialized with AI provider '{ai_provider}'")
-        self.logger.info(f"📊 TOON Mode: ALWAYS ENABLED (Token Optimization Mandatory)")
-        if ai_provider == 'AZURE_OPENAI':
-            deployment = getattr(Settings, 'AZURE_OPENAI_DEPLOYMENT_NAME', 'Unknown')
-            self.logger.info(f"🔷 TestCaseExtractor: Using Azure OpenAI deployment '{deployment}'")
-        else:
-            model = getattr(Settings, 'OPENAI_MODEL', 'Unknown')
-            self.logger.info(f"🔶 TestCaseExtractor: Using OpenAI model '{model}'")
+        for message in _provider_log_messages():
+            self.logger.info(message)
+        
+        # Requests share a static system prompt; a stable cache key lets the provider reuse its prefix
+        self.prompt_cache_key = "tc_extractor_v1_toon"
+        estimated_prefix_tokens = _SYSTEM_PROMPT_TOON_LEN // 4
+        if estimated_prefix_tokens < _PROVIDER_CACHE_MIN_TOKENS:
+            self.logger.debug(
+                f"📦 System prompt is ~{estimated_prefix_tokens} tokens, below the {_PROVIDER_CACHE_MIN_TOKENS}-token "
+                f"provider prompt-cache minimum; cached prefixes will only cover repeated requests for the same story"
+            )
 
     def extract_test_cases(self, user_story: UserStory, parent_story_id: str = None) -> TestCaseExtractionResult:
         """Extract test cases from a user story using AI"""
 
         try:
-            self.logger.info(f"Starting test case extraction for story: {user_story.heading}")
-            
-            # ═══════════════════════════════════════════════════════════════════════════
-            # LOG INPUT DATA - Title, Description & Acceptance Criteria
-            # ═══════════════════════════════════════════════════════════════════════════
-            self.logger.info("=" * 80)
-            self.logger.info("📋 INPUT DATA FOR TEST CASE EXTRACTION")
-            self.logger.info("=" * 80)
-            self.logger.info(f"📌 STORY ID: {parent_story_id or 'N/A'}")
-            self.logger.info(f"📌 TITLE: {user_story.heading}")
-            self.logger.info("-" * 80)
-            self.logger.info(f"📝 DESCRIPTION:")
-            # Log description with proper formatting (handle multi-line)
-            desc_lines = (user_story.description or "No description provided").split('\n')
-            for line in desc_lines:
-                self.logger.info(f"   {line}")
-            self.logger.info("-" * 80)
-            self.logger.info(f"✅ ACCEPTANCE CRITERIA ({len(user_story.acceptance_criteria)} items):")
-            if user_story.acceptance_criteria:
+            self.logger.info(
+                "📋 Extracting test cases: story=%s title=%r desc=%dch ac=%d",
+                parent_story_id or 'N/A', user_story.heading,
+                len(user_story.description or ''), len(user_story.acceptance_criteria)
+            )
+            # Full input echo is DEBUG only, so production runs don't emit one record per line
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("📝 DESCRIPTION:\n%s", user_story.description or "No description provided")
                 for i, ac in enumerate(user_story.acceptance_criteria, 1):
-                    self.logger.info(f"   {i}. {ac}")
-            else:
-                self.logger.info("   ⚠️  No acceptance criteria provided")
-            self.logger.info("=" * 80)
+                    self.logger.debug("✅ AC %d: %s", i, ac)
+
+            # A story with no description and no AC can only produce a low-quality AI result
+            if self._is_empty_story(user_story):
+                self.logger.warning("Empty user story (no description or acceptance criteria), skipping AI call")
+                return TestCaseExtractionResult(
+                    story_id=parent_story_id or "unknown",
+                    story_title=user_story.heading,
+                    test_cases=[self._manual_validation_test_case(parent_story_id)],
+                    extraction_successful=False,
+                    error_message="Empty user story"
+                )
 
             # Prepare the prompt for AI service
             prompt = self._build_extraction_prompt(user_story)
-            
-            # ═══════════════════════════════════════════════════════════════════════════
-            # LOG THE COMPLETE REQUEST PROMPT
-            # ═══════════════════════════════════════════════════════════════════════════
-            self.logger.info("")
-            self.logger.info("🤖 AI REQUEST PROMPT (USER MESSAGE)")
-            self.logger.info("=" * 80)
-            prompt_lines = prompt.split('\n')
-            for line in prompt_lines:
-                self.logger.info(f"   {line}")
-            self.logger.info("=" * 80)
+            self.logger.debug("🤖 AI REQUEST PROMPT (USER MESSAGE):\n%s", prompt)
 
             # Call AI service with better error handling
             try:
-                # Use TOON system prompt if enabled for token optimization
-                system_prompt = self._get_system_prompt_toon() if self.use_toon else self._get_system_prompt()
+                # TOON system prompt for token optimization
+                system_prompt = self._get_system_prompt_toon()
                 
-                # Log system prompt summary
-                self.logger.info("")
-                self.logger.info(f"🔧 SYSTEM PROMPT: {'TOON-Optimized' if self.use_toon else 'Standard'} mode")
-                self.logger.info(f"   System prompt length: {len(system_prompt)} characters")
-                self.logger.info(f"   User prompt length: {len(prompt)} characters")
-                self.logger.info("-" * 80)
+                self.logger.info(
+                    "🔧 SYSTEM PROMPT: TOON-Optimized mode (system %d chars, user %d chars)",
+                    _SYSTEM_PROMPT_TOON_LEN, len(prompt)
+                )
                 
                 messages = [
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": prompt}
                 ]
                 
+                # Identical prompts reuse previously parsed test cases when response caching is enabled
+                response_cache = get_response_cache()
+                cache_key = None
+                if response_cache is not None:
+                    cache_key = _TC_CACHE_KEY_PREFIX + ResponseCache.make_key(
+                        system_prompt, prompt, getattr(self.ai_client, 'model_name', ''), _TC_TEMPERATURE
+                    )
+                    cached = response_cache.get(cache_key)
+                    if cached is not None:
+                        test_cases = [TestCase(**tc_data) for tc_data in json.loads(cached)]
+                        self.logger.info(f"♻️ Using {len(test_cases)} cached test cases for story: {user_story.heading}")
+                        return TestCaseExtractionResult(
+                            story_id=parent_story_id or "unknown",
+                            story_title=user_story.heading,
+                            test_cases=test_cases,
+                            extraction_successful=True,
+                            error_message=""
+                        )
+                
                 self.logger.info(f"🚀 Sending request to AI service...")
                 
                 response_content = self.ai_client.chat_completion(
                     messages=messages,
-                    temperature=0.7,
-                    max_tokens=3000
+                    temperature=_TC_TEMPERATURE,
+                    max_tokens=3000,
+                    prompt_cache_key=self.prompt_cache_key
                 )
                 
                 # Validate that we got a response
@@ -149,23 +406,16 @@ class TestCaseExtractor:
                 )
 
             # Parse the response
-            test_cases = self._parse_test_cases_response(response_content)
+            test_cases, parsed_json = self._parse_test_cases_response_checked(response_content)
             
             # Validate that we got some test cases
             if not test_cases:
                 self.logger.warning("No test cases were extracted from AI response")
                 # Create a fallback test case
-                fallback_test_case = TestCase(
-                    title="Manual Validation Required",
-                    description="Please manually create test cases for this user story",
-                    test_type="positive",
-                    test_steps=["1. Review user story", "2. Create appropriate test cases"],
-                    expected_result="Test cases are created and validated.",
-                    preconditions=["User story is well-defined"],
-                    priority="Medium",
-                    parent_story_id=parent_story_id
-                )
-                test_cases = [fallback_test_case]
+                test_cases = [self._manual_validation_test_case(parent_story_id)]
+            elif cache_key is not None and parsed_json:
+                # Only cache test cases decoded from the AI's JSON, never text-scraped or generic ones
+                response_cache.set(cache_key, json.dumps([tc.model_dump() for tc in test_cases]))
 
             self.logger.info(f"Successfully extracted {len(test_cases)} test cases")
             
@@ -189,429 +439,356 @@ class TestCaseExtractor:
                 error_message=error_msg
             )
 
-    def _get_system_prompt_toon(self) -> str:
-        """Get the TOON-optimized system prompt for test case extraction (reduced token usage)"""
-        return """QA Expert. Generate test cases using Token Oriented Object Notation (TOON).
-
-**TOON FORMAT:**
-- Use abbrev. for common terms
-- Compact structure
-- Remove redundant words
-- Key fields only
-
-**Abbreviations:**
-TC=TestCase, desc=description, exp=expected, prereq=prerequisites, pos=positive, neg=negative, 
-edge=edge_case, sec=security, perf=performance, steps=test_steps, prio=priority, 
-auth=authentication, val=validation, UI=user_interface, API=application_interface, 
-DB=database, max=maximum, min=minimum, req=required, opt=optional
-
-**Test Types:** pos|neg|edge|sec|perf|integ
-
-**Priorities:** Crit|High|Med|Low
-
-**Coverage Areas:**
-1. Happy path (pos scenarios) - PRIORITIZE: Generate 8-10 positive test cases
-2. Error handling (neg/edge) - Generate 3-4 negative test cases
-3. Boundaries (min/max limits) - Generate 2-3 edge cases
-4. Security (auth/authz) - Generate 1-2 security test cases
-5. Integration points
-6. Data validation
-
-**Output Format (JSON):**
-{
-  "tcs": [
-    {
-      "t": "Action Verb + Specific Target",
-      "desc": "Brief objective",
-      "type": "pos|neg|edge|sec",
-      "prio": "Crit|High|Med|Low",
-      "steps": ["1.Action+input", "2.Verify+criteria"],
-      "exp": "Clear outcome.",
-      "prereq": "Setup needs",
-      "data": {"valid":[],"invalid":[],"boundary":[]},
-      "auto": "High|Med|Low",
-      "time": "5m|15m|30m|1h"
-    }
-  ],
-  "cov": {
-    "func": ["area1","area2"],
-    "risk": ["high_risk1"]
-  }
-}
-
-**Title Rules:**
-- Start: Verify|Test|Check|Validate|Handle|Ensure
-- Be specific
-- No generic titles
-
-Generate practical, executable TCs with good coverage."""
-
-    def _get_system_prompt(self) -> str:
-        """Get the system prompt for test case extraction"""
-        return """You are a senior QA engineer and test architect with expertise in comprehensive test design patterns, risk-based testing, and modern testing methodologies.
-
-Your task is to analyze user stories and generate strategic, high-value test cases that cover:
-
-**CORE TESTING AREAS:**
-- Positive test scenarios (happy path with realistic user journeys)
-- Negative test scenarios (error handling, invalid inputs, system failures)
-- Edge cases and boundary conditions (limits, thresholds, corner cases)
-- Security testing (authentication, authorization, data protection)
-- Performance considerations (load, responsiveness, resource usage)
-- Accessibility and usability validation
-- Integration points and data flow validation
-- Business rule enforcement and compliance
-
-**TEST DESIGN PRINCIPLES:**
-- Apply risk-based testing (focus on high-impact, high-probability scenarios)
-- Consider user personas and real-world usage patterns
-- Include both functional and non-functional requirements
-- Design for automation potential where applicable
-- Consider cross-browser/platform compatibility when relevant
-- Include data validation at multiple layers (client, server, database)
-
-For each test case, you MUST provide:
-1. A clear, descriptive title that SPECIFICALLY describes what is being tested
-   - Bad example: "Functional Test Case"
-   - Good examples: 
-     - "Verify Login with Valid Credentials"
-     - "Handle Invalid Password Input"
-     - "Check Email Field Maximum Length"
-2. Test type (must be one of: positive, negative, edge_case)
-3. A brief description of the test objective
-4. Detailed test steps (numbered list of specific actions)
-5. Clear expected result (complete sentence ending with a period)
-6. Prerequisites (environment, data, or system state needed)
-
-Important: The title is critical and must follow these rules:
-1. Be specific to the test case's purpose
-2. Always start with an action verb like Verify, Validate, Check, Test, Handle, or Ensure
-3. Never use generic titles like 'Functional Test Case' or 'Test Case 1'
-
-Examples of good titles:
-- "Verify Login with Valid Credentials"
-- "Test Empty Password Field Validation"
-- "Handle Invalid Email Format"
-- "Ensure Session Timeout After Inactivity"
-- "Validate Maximum Password Length"
-- "Check Error Message for Failed Login"
-
-Format your response as JSON with the following structure:
-{
-  "test_cases": [
-    {
-      "title": "Specific test case title starting with action verb",
-      "description": "Brief description of what this test validates",
-      "test_type": "positive|negative|edge_case|security|performance|integration",
-      "priority": "Critical|High|Medium|Low",
-      "risk_level": "High|Medium|Low",
-      "user_persona": "Specific user type (e.g., 'Admin User', 'Guest Customer')",
-      "steps": [
-        "Step 1: Specific action with clear inputs",
-        "Step 2: Expected system response or next action",
-        "Step 3: Verification step with specific criteria"
-      ],
-      "expected_result": "Clear, measurable expected outcome",
-      "prerequisites": "Specific setup requirements",
-      "test_data": {
-        "valid_inputs": ["example1", "example2"],
-        "invalid_inputs": ["invalid1", "invalid2"],
-        "boundary_values": ["min_value", "max_value"]
-      },
-      "automation_potential": "High|Medium|Low",
-      "estimated_duration": "5 minutes|15 minutes|30 minutes|1 hour",
-      "dependencies": ["Other test cases or system components"],
-      "business_impact": "Revenue|User_Experience|Compliance|Security|Performance"
-    }
-  ],
-  "coverage_summary": {
-    "functional_coverage": ["area1", "area2"],
-    "risk_coverage": ["high_risk_scenario1", "high_risk_scenario2"],
-    "user_journey_coverage": ["journey1", "journey2"]
-  }
-}
-
-Ensure test cases are practical, executable, and provide good coverage of the functionality."""
-
-    def _build_extraction_prompt(self, user_story: UserStory) -> str:
-        """Build the extraction prompt from user story details (TOON-optimized if enabled)"""
+    def extract_test_cases_iter(self, user_story: UserStory, parent_story_id: str = None) -> Iterator[TestCase]:
+        """
+        Stream test cases for a user story, yielding each one as soon as its JSON object is complete.
+        Uses ijson for incremental parsing when installed; otherwise (or if the streamed JSON needs
+        cleanup) the remaining test cases are parsed once the full response has arrived.
+        AI service errors propagate to the caller.
+        """
+        self.logger.info(
+            "📡 Streaming test cases: story=%s title=%r", parent_story_id or 'N/A', user_story.heading
+        )
+        if self._is_empty_story(user_story):
+            self.logger.warning("Empty user story (no description or acceptance criteria), skipping AI call")
+            yield self._manual_validation_test_case(parent_story_id)
+            return
+        prompt = self._build_extraction_prompt(user_story)
+        messages = [
+            {"role": "system", "content": self._get_system_prompt_toon()},
+            {"role": "user", "content": prompt}
+        ]
+        
+        chunks = []
+        yielded = 0
+        events = coro = None
+        if ijson is not None:
+            events = ijson.sendable_list()
+            coro = ijson.items_coro(events, "tcs.item", use_float=True)
+        json_started = False
+        
+        for chunk in self.ai_client.chat_completion_stream(
+            messages=messages,
+            temperature=_TC_TEMPERATURE,
+            max_tokens=_TC_MAX_TOKENS_PER_STORY,
+            prompt_cache_key=self.prompt_cache_key
+        ):
+            chunks.append(chunk)
+            if coro is None:
+                continue
+            
+            # Skip any preamble such as a ```json fence before the JSON object starts
+            if not json_started:
+                json_start = chunk.find('{')
+                if json_start == -1:
+                    continue
+                chunk = chunk[json_start:]
+                json_started = True
+            
+            try:
+                coro.send(chunk.encode("utf-8"))
+            except Exception as e:
+                # Trailing text or JS-style syntax; finish with the full-response parser
+                self.logger.debug("Incremental parse stopped after %d test cases: %s", yielded, e)
+                coro = None
+            for tc_data in events:
+                yielded += 1
+                yield self._toon_test_case(tc_data, yielded)
+            del events[:]
+        
+        response_content = "".join(chunks)
+        if not response_content.strip():
+            raise ValueError("Empty response from AI service")
         
-        # Log which fields are being included in the prompt
-        self.logger.debug("=" * 60)
-        self.logger.debug("📦 BUILDING EXTRACTION PROMPT - FIELDS INCLUDED:")
-        self.logger.debug(f"   ✅ Title: '{user_story.heading}' ({len(user_story.heading)} chars)")
-        self.logger.debug(f"   ✅ Description: {len(user_story.description or '')} chars")
-        self.logger.debug(f"   ✅ Acceptance Criteria: {len(user_story.acceptance_criteria)} items")
-        self.logger.debug("=" * 60)
-
-        if self.use_toon:
-            return self._build_toon_prompt(user_story)
+        self.ai_client.track_usage(
+            messages=messages,
+            response_text=response_content,
+            call_type="test_case_extraction",
+            toon_enabled=self.use_toon,
+            success=True,
+            story_id=parent_story_id or "",
+            story_title=user_story.heading
+        )
+        
+        # Anything the incremental parser could not emit comes from the full-response parser; its
+        # text-fallback results don't line up with the streamed ones, so they only stand in for an empty stream
+        parsed, parsed_json = self._parse_test_cases_response_checked(response_content)
+        if parsed_json:
+            remaining = parsed[yielded:]
+        elif yielded:
+            self.logger.warning(f"Streamed response is not valid JSON, keeping the {yielded} test cases already streamed")
+            remaining = []
+        else:
+            remaining = parsed
+        for test_case in remaining:
+            yield test_case
+        self.logger.info(f"Streamed {yielded + len(remaining)} test cases ({yielded} incrementally)")
+
+    def extract_test_cases_batch(self, user_stories: List[UserStory], parent_story_ids: List[str] = None) -> List[TestCaseExtractionResult]:
+        """
+        Extract test cases for several user stories with as few AI calls as possible.
+        Stories are grouped up to a prompt token budget and sent in one request per group;
+        any story missing from (or unparseable in) a batch response falls back to extract_test_cases.
+        """
+        parent_story_ids = list(parent_story_ids or [None] * len(user_stories))
+        results: List[TestCaseExtractionResult] = [None] * len(user_stories)
+        
+        # Group stories so each request stays within the prompt token budget and the model's output limit
+        max_stories = min(_BATCH_MAX_STORIES, max(1, _completion_token_limit() // _BATCH_MIN_TOKENS_PER_STORY))
+        batches, current, current_tokens = [], [], 0
+        for index, user_story in enumerate(user_stories):
+            if self._is_empty_story(user_story):
+                results[index] = self.extract_test_cases(user_story, parent_story_ids[index])
+                continue
+            story_prompt = self._build_toon_story_block(user_story)
+            story_tokens = len(story_prompt) // 4
+            if current and (len(current) >= max_stories or current_tokens + story_tokens > _BATCH_MAX_PROMPT_TOKENS):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append((index, story_prompt))
+            current_tokens += story_tokens
+        if current:
+            batches.append(current)
+        
+        for batch in batches:
+            if len(batch) == 1:
+                index = batch[0][0]
+                results[index] = self.extract_test_cases(user_stories[index], parent_story_ids[index])
+                continue
+            
+            parsed = self._extract_batch(batch, user_stories, parent_story_ids)
+            for position, (index, _prompt) in enumerate(batch, 1):
+                test_cases = parsed.get(position)
+                if test_cases:
+                    for test_case in test_cases:
+                        test_case.parent_story_id = parent_story_ids[index]
+                    results[index] = TestCaseExtractionResult(
+                        story_id=parent_story_ids[index] or "unknown",
+                        story_title=user_stories[index].heading,
+                        test_cases=test_cases,
+                        extraction_successful=True,
+                        error_message=""
+                    )
+                else:
+                    self.logger.warning(f"No batch result for story '{user_stories[index].heading}', extracting individually")
+                    results[index] = self.extract_test_cases(user_stories[index], parent_story_ids[index])
+        
+        return results
+    
+    def _extract_batch(self, batch, user_stories: List[UserStory], parent_story_ids: List[str]) -> Dict[int, List[TestCase]]:
+        """Send one batched request and return parsed test cases keyed by 1-based story position"""
+        # The static preamble is sent once, followed by each story's block
+        prompt = "\n\n".join([_PROMPT_PREAMBLE_TOON] + [
+            f"===STORY_{position}===\n{story_prompt}" for position, (_index, story_prompt) in enumerate(batch, 1)
+        ])
+        messages = [
+            {"role": "system", "content": _SYSTEM_PROMPT_TOON + _BATCH_SYSTEM_PROMPT_SUFFIX},
+            {"role": "user", "content": prompt}
+        ]
         
-        # Standard prompt (existing logic)
-        # Analyze the user story for context
-        context_analysis = self._analyze_story_context(user_story)
+        self.logger.info(f"🚀 Sending batched test case request for {len(batch)} stories...")
+        try:
+            response_content = self.ai_client.chat_completion(
+                messages=messages,
+                temperature=_TC_TEMPERATURE,
+                max_tokens=min(_TC_MAX_TOKENS_PER_STORY * len(batch), _completion_token_limit()),
+                prompt_cache_key=f"{self.prompt_cache_key}_batch"
+            )
+            if not response_content or not response_content.strip():
+                raise ValueError("Empty response from AI service")
+            
+            self.ai_client.track_usage(
+                messages=messages,
+                response_text=response_content,
+                call_type="test_case_extraction",
+                toon_enabled=self.use_toon,
+                success=True,
+                story_id=",".join(parent_story_ids[index] or "" for index, _prompt in batch),
+                story_title=f"Batch of {len(batch)} stories"
+            )
+            
+            response_content = response_content.strip()
+            json_start = response_content.find('{')
+            if json_start == -1:
+                raise ValueError("No JSON object found in batch response")
+            parsed_response, _end = _JSON_DECODER.raw_decode(response_content, json_start)
+            
+            parsed = {}
+            for entry in parsed_response.get("results", []):
+                try:
+                    position = int(entry.get("story_id"))
+                except (TypeError, ValueError):
+                    continue
+                parsed[position] = self._parse_toon_format({"tcs": entry.get("tcs", [])})
+            return parsed
         
-        prompt = f"""Please generate comprehensive, high-value test cases for the following user story:
-
-**Story Title:** {user_story.heading}
-
-**Description:** {user_story.description}
-
-**Acceptance Criteria:**"""
-
-        for i, criteria in enumerate(user_story.acceptance_criteria, 1):
-            prompt += f"\n{i}. {criteria}"
-
-        # Add context-specific guidance
-        if context_analysis:
-            prompt += f"\n\n**Context Analysis:**"
-            if context_analysis.get('domain'):
-                prompt += f"\n- Domain: {context_analysis['domain']}"
-            if context_analysis.get('user_types'):
-                prompt += f"\n- User Types: {', '.join(context_analysis['user_types'])}"
-            if context_analysis.get('data_elements'):
-                prompt += f"\n- Key Data Elements: {', '.join(context_analysis['data_elements'])}"
-            if context_analysis.get('integrations'):
-                prompt += f"\n- System Integrations: {', '.join(context_analysis['integrations'])}"
-            if context_analysis.get('security_aspects'):
-                prompt += f"\n- Security Considerations: {', '.join(context_analysis['security_aspects'])}"
-
-        prompt += """
-
-**GENERATE TEST CASES WITH FOCUS ON:**
-1. **Business-Critical Scenarios**: Test cases that validate core business value
-2. **User Journey Coverage**: End-to-end workflows from different user perspectives
-3. **Risk Mitigation**: High-impact failure scenarios and their prevention
-4. **Data Integrity**: Validation of data accuracy, consistency, and security
-5. **Integration Points**: API calls, database operations, third-party services
-6. **Error Recovery**: Graceful handling of errors and system recovery
-7. **Performance Boundaries**: Response times, concurrent users, data volumes
-8. **Compliance & Security**: Authorization, data protection, audit trails
-
-**PRIORITIZE TEST CASES BY:**
-- Business impact (revenue, user experience, compliance)
-- Risk level (probability × impact of failure)
-- Test execution complexity and maintenance cost
-
-**TEST CASE DISTRIBUTION (Minimum 15-18 test cases total):**
-- **POSITIVE Test Cases: 8-10 cases** (happy path scenarios, main user journeys, valid data flows, successful operations)
-- **NEGATIVE Test Cases: 3-4 cases** (error handling, invalid inputs, system failures)
-- **EDGE Cases: 2-3 cases** (boundary conditions, limits, thresholds)
-- **SECURITY Test Cases: 1-2 cases** (authentication, authorization, data protection - if applicable)
-
-Generate practical, executable test cases that a QA engineer can implement effectively. ENSURE strong coverage of positive test scenarios."""
-
-        return prompt
+        except Exception as e:
+            self.logger.error(f"Batched test case extraction failed, falling back to per-story calls: {str(e)}")
+            return {}
+
+    def _get_system_prompt_toon(self) -> str:
+        """Get the TOON-optimized system prompt for test case extraction (reduced token usage)"""
+        return _SYSTEM_PROMPT_TOON
 
     def _build_toon_prompt(self, user_story: UserStory) -> str:
         """Build TOON-optimized prompt (reduced token usage by ~50-60%)"""
+        self.logger.debug(
+            "📦 Building extraction prompt: title=%r (%d chars), desc=%d chars, ac=%d items",
+            user_story.heading, len(user_story.heading),
+            len(user_story.description or ''), len(user_story.acceptance_criteria)
+        )
         
+        return f"{_PROMPT_PREAMBLE_TOON}\n\n{self._build_toon_story_block(user_story)}"
+
+    def _build_toon_story_block(self, user_story: UserStory) -> str:
+        """Build the story-specific part of the TOON prompt (title, description, AC and context)"""
         # Compact context analysis
         ctx = self._analyze_story_context(user_story)
         
-        prompt = f"""Gen TCs for story (TOON format):
-
-**Title:** {user_story.heading}
+        parts = [f"""**Title:** {user_story.heading}
 
 **Desc:** {user_story.description}
 
-**AC:**"""
-        
-        for i, ac in enumerate(user_story.acceptance_criteria, 1):
-            prompt += f"\n{i}. {ac}"
+**AC:**"""]
+        parts.extend(f"{i}. {ac}" for i, ac in enumerate(user_story.acceptance_criteria, 1))
         
         # Add compact context if available
         if ctx:
-            prompt += "\n\n**Ctx:**"
+            ctx_parts = ["**Ctx:**"]
             if ctx.get('domain'):
-                prompt += f" Dom:{ctx['domain']}"
+                ctx_parts.append(f" Dom:{ctx['domain']}")
             if ctx.get('user_types'):
-                prompt += f" | Users:{','.join(ctx['user_types'][:2])}"
+                ctx_parts.append(f" | Users:{','.join(ctx['user_types'][:2])}")
             if ctx.get('data_elements'):
-                prompt += f" | Data:{','.join(ctx['data_elements'][:3])}"
+                ctx_parts.append(f" | Data:{','.join(ctx['data_elements'][:3])}")
             if ctx.get('security_aspects'):
-                prompt += f" | Sec:{','.join(ctx['security_aspects'][:2])}"
+                ctx_parts.append(f" | Sec:{','.join(ctx['security_aspects'][:2])}")
+            parts.extend(("", "".join(ctx_parts)))
         
-        prompt += """
-
-**Focus:**
-1. Biz-critical scenarios
-2. User journeys (diff personas)
-3. High-risk failures
-4. Data integrity
-5. Integration pts
-6. Error recovery
-7. Perf boundaries
+        return "\n".join(parts)
 
-**TC Distribution (Min 15-18 TCs):**
-- Pos: 8-10 (happy path, user journeys, main flows)
-- Neg: 3-4 (error handling, invalid inputs)
-- Edge: 2-3 (boundaries, limits)
-- Sec: 1-2 (auth/authz if relevant)
-
-Gen comprehensive TCs with strong pos coverage."""
-        
-        return prompt
+    # TOON is mandatory, so the extraction prompt is always the TOON prompt
+    _build_extraction_prompt = _build_toon_prompt
 
     def _analyze_story_context(self, user_story: UserStory) -> Dict[str, List[str]]:
         """Analyze user story to extract testing context"""
+        # Build the story text once and share it across the extractors
+        text = f"{user_story.heading} {user_story.description}"
+        text_with_ac = f"{text} {' '.join(user_story.acceptance_criteria)}"
+        text_lower = text.lower()
+        if _KEYWORD_AUTOMATON is not None:
+            # One automaton pass finds every domain, integration and security keyword
+            hits = self._scan_keywords(text_lower)
+            domain = _DOMAIN_NAMES[min(hits['domain'])] if hits['domain'] else 'general'
+            integrations = [_INTEGRATION_NAMES[rank] for rank in sorted(hits['integrations'])[:3]]
+            security_aspects = [_SECURITY_KEYWORDS[rank] for rank in sorted(hits['security_aspects'])[:3]]
+        else:
+            domain = self._detect_domain(text_lower)
+            integrations = self._extract_integrations(text_lower)
+            security_aspects = self._extract_security_aspects(text_lower)
         context = {
-            'domain': self._detect_domain(user_story),
-            'user_types': self._extract_user_types(user_story),
-            'data_elements': self._extract_data_elements(user_story),
-            'integrations': self._extract_integrations(user_story),
-            'security_aspects': self._extract_security_aspects(user_story)
+            'domain': domain,
+            'user_types': self._extract_user_types(text),
+            'data_elements': self._extract_data_elements(text_with_ac),
+            'integrations': integrations,
+            'security_aspects': security_aspects
         }
         return {k: v for k, v in context.items() if v}
     
-    def _detect_domain(self, user_story: UserStory) -> str:
-        """Detect the application domain for context-specific testing"""
-        text = f"{user_story.heading} {user_story.description}".lower()
-        
-        domains = {
-            'e-commerce': ['shop', 'cart', 'order', 'payment', 'product', 'checkout', 'purchase'],
-            'banking': ['account', 'transfer', 'balance', 'transaction', 'loan', 'credit'],
-            'healthcare': ['patient', 'medical', 'appointment', 'prescription', 'diagnosis'],
-            'education': ['student', 'course', 'grade', 'assignment', 'enrollment'],
-            'hrms': ['employee', 'payroll', 'leave', 'performance', 'attendance']
-        }
-        
-        for domain, keywords in domains.items():
-            if any(keyword in text for keyword in keywords):
-                return domain
-        return 'general'
+    @staticmethod
+    def _scan_keywords(text_lower: str) -> Dict[str, set]:
+        """
+        Collect the ranks of all keywords found in the lowercased text, per category.
+        Match offsets and word-start checks both refer to text_lower: str.lower() can change the
+        length (e.g. 'İ' lowers to 'i' + U+0307), so offsets are never mapped back to the original text.
+        """
+        hits = {'domain': set(), 'integrations': set(), 'security_aspects': set()}
+        for end, (length, values) in _KEYWORD_AUTOMATON.iter(text_lower):
+            start = end - length + 1
+            for category, rank, word_start in values:
+                if word_start and start > 0:
+                    previous = text_lower[start - 1]
+                    if previous.isalnum() or previous == '_':
+                        continue
+                hits[category].add(rank)
+        return hits
     
-    def _extract_user_types(self, user_story: UserStory) -> List[str]:
-        """Extract different user types mentioned in the story"""
-        import re
-        text = f"{user_story.heading} {user_story.description}"
-        
-        # Common user type patterns
-        patterns = [
-            r'(?:as an?|as a)\s+([a-zA-Z\s]+?)(?:,|\s+I)',
-            r'(?:user|customer|admin|manager|employee|student|patient)\w*',
-            r'(?:logged[\s-]?in|authenticated|authorized)\s+user'
-        ]
-        
-        user_types = set()
-        for pattern in patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                user_type = match.group(1) if match.groups() else match.group(0)
-                user_types.add(user_type.strip().lower())
-        
-        return list(user_types)[:3]  # Limit to 3 most relevant
+    def _detect_domain(self, text_lower: str) -> str:
+        """Detect the application domain for context-specific testing from the lowercased story text"""
+        # Earlier domains win regardless of where their keyword appears in the text
+        best = None
+        for match in _DOMAIN_RE.finditer(text_lower):
+            rank = _DOMAIN_PRIORITY[match.lastgroup]
+            if best is None or rank < best:
+                best = rank
+                if rank == 0:
+                    break
+        return _DOMAIN_NAMES[best] if best is not None else 'general'
     
-    def _extract_data_elements(self, user_story: UserStory) -> List[str]:
-        """Extract key data elements that need testing"""
-        import re
-        text = f"{user_story.heading} {user_story.description} {' '.join(user_story.acceptance_criteria)}"
-        
-        # Common data element patterns
-        patterns = [
-            r'\b(?:email|password|username|name|address|phone|date|amount|price|quantity)\b',
-            r'\b(?:id|code|number|reference|token|key)\b',
-            r'\b(?:status|type|category|level|priority)\b'
-        ]
-        
-        data_elements = set()
-        for pattern in patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                data_elements.add(match.group(0).lower())
+    def _extract_user_types(self, text: str) -> List[str]:
+        """Extract different user types mentioned in the story text"""
+        # Insertion-ordered dedup keeps the first-mentioned types (and a stable prompt)
+        user_types = {}
+        for pattern in _USER_TYPE_PATTERNS:
+            # findall returns the captured name for the "as a ..." pattern, the whole match otherwise
+            for match in pattern.findall(text):
+                user_type = match.strip().lower()
+                if user_type:
+                    user_types[user_type] = None
+                    if len(user_types) >= 3:  # Limit to 3 most relevant
+                        return list(user_types)
         
+        return list(user_types)
+    
+    def _extract_data_elements(self, text_with_ac: str) -> List[str]:
+        """Extract key data elements that need testing from the story text and acceptance criteria"""
+        # Insertion-ordered dedup keeps the prompt (and its cache keys) independent of the hash seed
+        data_elements = dict.fromkeys(
+            match.group(0).lower()
+            for pattern in _DATA_ELEMENT_PATTERNS
+            for match in pattern.finditer(text_with_ac)
+        )
         return list(data_elements)[:5]  # Limit to 5 most relevant
     
-    def _extract_integrations(self, user_story: UserStory) -> List[str]:
-        """Extract system integrations mentioned"""
-        import re
-        text = f"{user_story.heading} {user_story.description}"
-        
-        # Integration keywords
-        integration_keywords = [
-            'api', 'service', 'database', 'external', 'third.party', 'integration',
-            'payment.gateway', 'notification', 'email', 'sms', 'webhook'
-        ]
-        
-        integrations = []
-        for keyword in integration_keywords:
-            pattern = keyword.replace('.', r'[\s\-]?')
-            if re.search(pattern, text, re.IGNORECASE):
-                integrations.append(keyword.replace('.', ' '))
-        
+    def _extract_integrations(self, text: str) -> List[str]:
+        """Extract system integrations mentioned in the story text"""
+        integrations = [name for name, pattern in _INTEGRATION_PATTERNS if pattern.search(text)]
         return integrations[:3]  # Limit to 3 most relevant
     
-    def _extract_security_aspects(self, user_story: UserStory) -> List[str]:
-        """Extract security-related aspects"""
-        import re
-        text = f"{user_story.heading} {user_story.description}"
-        
-        security_keywords = [
-            'login', 'authentication', 'authorization', 'permission', 'access',
-            'secure', 'encrypt', 'privacy', 'gdpr', 'compliance', 'audit'
-        ]
-        
-        security_aspects = []
-        for keyword in security_keywords:
-            if re.search(rf'\b{keyword}\w*', text, re.IGNORECASE):
-                security_aspects.append(keyword)
-        
+    def _extract_security_aspects(self, text: str) -> List[str]:
+        """Extract security-related aspects from the story text"""
+        security_aspects = [keyword for keyword, pattern in _SECURITY_PATTERNS if pattern.search(text)]
         return security_aspects[:3]  # Limit to 3 most relevant
 
     def _parse_test_cases_response(self, response_content: str) -> List[TestCase]:
         """Parse the AI response into TestCase objects (supports both TOON and standard format)"""
+        return self._parse_test_cases_response_checked(response_content)[0]
 
-        try:
-            # Clean up the response content
-            response_content = response_content.strip()
+    def _parse_test_cases_response_checked(self, response_content: str) -> Tuple[List[TestCase], bool]:
+        """
+        Parse the AI response into TestCase objects.
+        Also returns whether they came from the response JSON (False when the text fallback ran).
+        """
 
-            # Handle case where response might be wrapped in markdown code blocks
-            if response_content.startswith("```json"):
-                response_content = response_content[7:]  # Remove ```json
-            if response_content.endswith("```"):
-                response_content = response_content[:-3]  # Remove ```
+        try:
+            # Strip markdown fences and fix JavaScript-like syntax in a single pass
+            response_content = _JSON_CLEAN_RE.sub(_json_clean_replacement, response_content.strip())
 
-            # Fix common JavaScript-like syntax issues in JSON
-            import re
-            response_content = re.sub(r'"a"\.repeat\(\d+\)', '"a" * 255', response_content)
-            response_content = re.sub(r'//.*$', '', response_content, flags=re.MULTILINE)  # Remove JS comments
-            
-            # Handle extra data after JSON by finding the valid JSON portion
-            # Look for the JSON object boundaries
+            # Decode the first JSON object and ignore any trailing text after it
             json_start = response_content.find('{')
             if json_start == -1:
                 self.logger.warning("No JSON object found in response, trying fallback parsing")
-                return self._fallback_parse_test_cases(response_content)
-                
-            # Find the matching closing brace for the first opening brace
-            brace_count = 0
-            json_end = json_start
-            for i, char in enumerate(response_content[json_start:], json_start):
-                if char == '{':
-                    brace_count += 1
-                elif char == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        json_end = i + 1
-                        break
-            
-            # Extract only the JSON portion
-            if json_end > json_start:
-                json_content = response_content[json_start:json_end]
-                self.logger.debug(f"Extracted JSON content: {json_content[:200]}...")
-            else:
-                json_content = response_content
+                return self._fallback_parse_test_cases(response_content), False
 
-            # Parse JSON
-            parsed_response = json.loads(json_content)
+            parsed_response, _json_end = _JSON_DECODER.raw_decode(response_content, json_start)
             
             # Check if this is TOON format or standard format
             if "tcs" in parsed_response:
                 self.logger.info("Detected TOON format response")
-                return self._parse_toon_format(parsed_response)
+                return self._parse_toon_format(parsed_response), True
             else:
                 self.logger.info("Detected standard format response")
-                return self._parse_standard_format(parsed_response)
+                return self._parse_standard_format(parsed_response), True
 
         except json.JSONDecodeError as e:
             self.logger.error(f"Failed to parse JSON response: {str(e)}")
@@ -625,71 +802,76 @@ Gen comprehensive TCs with strong pos coverage."""
             
             # Fallback: Try to extract test cases using text parsing
             self.logger.info("Falling back to text-based parsing...")
-            return self._fallback_parse_test_cases(response_content)
+            return self._fallback_parse_test_cases(response_content), False
 
         except Exception as e:
             self.logger.error(f"Error parsing test cases: {str(e)}")
-            return []
+            return [], False
 
     def _parse_toon_format(self, parsed_response: Dict) -> List[TestCase]:
         """Parse TOON (Token Oriented Object Notation) format response"""
         test_cases_data = parsed_response.get("tcs", [])
-        test_cases = []
+        test_cases = [self._toon_test_case(tc_data, index) for index, tc_data in enumerate(test_cases_data, 1)]
         
-        # TOON abbreviation mappings
-        type_map = {
-            "pos": "positive",
-            "neg": "negative",
-            "edge": "edge_case",
-            "sec": "security",
-            "perf": "performance",
-            "integ": "integration"
-        }
+        self.logger.info(f"Successfully parsed {len(test_cases)} test cases from TOON format")
+        return test_cases
+
+    @staticmethod
+    def _is_empty_story(user_story: UserStory) -> bool:
+        """True when a story has neither a description nor acceptance criteria"""
+        return not (user_story.description or '').strip() and not user_story.acceptance_criteria
+
+    @staticmethod
+    def _manual_validation_test_case(parent_story_id: str = None) -> TestCase:
+        """Placeholder test case asking for manual test design when none could be generated"""
+        return TestCase(
+            title="Manual Validation Required",
+            description="Please manually create test cases for this user story",
+            test_type="positive",
+            test_steps=["1. Review user story", "2. Create appropriate test cases"],
+            expected_result="Test cases are created and validated.",
+            preconditions=["User story is well-defined"],
+            priority="Medium",
+            parent_story_id=parent_story_id
+        )
+
+    def _toon_test_case(self, tc_data: Dict, index: int) -> TestCase:
+        """Build a TestCase from one TOON "tcs" entry (index is its 1-based position)"""
+        # Map TOON fields to standard fields
+        get = tc_data.get
+        title = get("t", "")
+        description = get("desc", "")
+        test_type = _TOON_TYPE_MAP.get(get("type", "pos"), "positive")
+        prio = get("prio", "Med")
+        priority = _TOON_PRIO_MAP.get(prio, prio)
+        expected_result = get("exp", "")
+        prerequisites = get("prereq", "")
         
-        prio_map = {
-            "Crit": "Critical",
-            "Med": "Medium"
-        }
+        # Ensure prerequisites is a list
+        if isinstance(prerequisites, str):
+            prerequisites = [prerequisites] if prerequisites else []
         
-        for tc_data in test_cases_data:
-            # Map TOON fields to standard fields
-            title = tc_data.get("t", "")
-            description = tc_data.get("desc", "")
-            test_type = type_map.get(tc_data.get("type", "pos"), "positive")
-            priority = prio_map.get(tc_data.get("prio", "Med"), tc_data.get("prio", "Medium"))
-            steps = tc_data.get("steps", [])
-            expected_result = tc_data.get("exp", "")
-            prerequisites = tc_data.get("prereq", "")
-            
-            # Ensure prerequisites is a list
-            if isinstance(prerequisites, str):
-                prerequisites = [prerequisites] if prerequisites else []
-            
-            # Use test steps as-is without adding numbers (ADO has default numbering)
-            formatted_steps = [step.strip() for step in steps if step.strip()]
-            
-            # Ensure expected result ends with a period
-            if expected_result and not expected_result.endswith('.'):
-                expected_result += '.'
-            
-            # Generate title if missing
-            if not title:
-                title = description or f"Test Case {len(test_cases) + 1}"
-            
-            test_case = TestCase(
-                title=title,
-                description=description,
-                test_type=test_type,
-                test_steps=formatted_steps,
-                expected_result=expected_result,
-                preconditions=prerequisites,
-                priority=priority,
-                parent_story_id=None
-            )
-            test_cases.append(test_case)
+        # Use test steps as-is without adding numbers (ADO has default numbering)
+        formatted_steps = list(filter(None, map(str.strip, get("steps", []))))
         
-        self.logger.info(f"Successfully parsed {len(test_cases)} test cases from TOON format")
-        return test_cases
+        # Ensure expected result ends with a period
+        if expected_result and not expected_result.endswith('.'):
+            expected_result += '.'
+        
+        # Generate title if missing
+        if not title:
+            title = description or f"Test Case {index}"
+        
+        return TestCase(
+            title=title,
+            description=description,
+            test_type=test_type,
+            test_steps=formatted_steps,
+            expected_result=expected_result,
+            preconditions=prerequisites,
+            priority=priority,
+            parent_story_id=None
+        )
 
     def _parse_standard_format(self, parsed_response: Dict) -> List[TestCase]:
         """Parse standard format response"""
@@ -697,41 +879,41 @@ Gen comprehensive TCs with strong pos coverage."""
 
         test_cases = []
         for tc_data in test_cases_data:
+            get = tc_data.get
             # Handle field name mismatch: steps vs test_steps
-            steps = tc_data.get("test_steps", tc_data.get("steps", []))
+            steps = get("test_steps") if "test_steps" in tc_data else get("steps", [])
 
             # Ensure prerequisites is a list if it's a string
-            prerequisites = tc_data.get("prerequisites", "")
+            prerequisites = get("prerequisites", "")
             if isinstance(prerequisites, str):
                 prerequisites = [prerequisites] if prerequisites else []
 
             # Use test steps as-is without adding numbers (ADO has default numbering)
-            formatted_steps = [step.strip() for step in steps if step.strip()]
+            formatted_steps = list(filter(None, map(str.strip, steps)))
 
             # Ensure expected result is a complete sentence
-            expected_result = tc_data.get("expected_result", "")
+            expected_result = get("expected_result", "")
             if not expected_result.endswith('.'):
                 expected_result += '.'
 
             # Generate a descriptive title if none provided
-            title = tc_data.get("title")
+            description = get("description", "")
+            title = get("title")
             if not title:
                 # Create a title from test description or first test step
-                description = tc_data.get("description", "").strip()
-                first_step = next((step for step in formatted_steps if step), "")
-                title = description or first_step.split(".", 1)[-1].strip() or "Validate User Story"
+                first_step = formatted_steps[0] if formatted_steps else ""
+                title = description.strip() or first_step.split(".", 1)[-1].strip() or "Validate User Story"
 
-            test_case = TestCase(
+            test_cases.append(TestCase(
                 title=title,
-                description=tc_data.get("description", ""),
-                test_type=tc_data.get("test_type", "positive"),
+                description=description,
+                test_type=get("test_type", "positive"),
                 test_steps=formatted_steps,
                 expected_result=expected_result,
                 preconditions=prerequisites,
-                priority=tc_data.get("priority", "Medium"),
+                priority=get("priority", "Medium"),
                 parent_story_id=None
-            )
-            test_cases.append(test_case)
+            ))
 
         self.logger.info(f"Successfully parsed {len(test_cases)} test cases")
         return test_cases
@@ -744,51 +926,42 @@ Gen comprehensive TCs with strong pos coverage."""
         # Try multiple parsing strategies
         
         # Strategy 1: Look for structured text patterns
-        import re
         
-        # Pattern for test case blocks
-        test_case_pattern = r'(?i)(?:test\s*case|title|tc\s*\d+)[:\-\s]*([^\n]+)'
-        title_matches = re.findall(test_case_pattern, content)
-        
-        if title_matches:
-            self.logger.info(f"Found {len(title_matches)} potential test case titles using regex")
-            for i, title in enumerate(title_matches[:10]):  # Limit to 10 test cases
-                test_case = TestCase(
-                    title=title.strip(),
-                    description=f"Generated from AI response - Test case {i+1}",
-                    test_type="positive",
-                    test_steps=[f"Execute test scenario: {title.strip()}"],
-                    expected_result="System behaves as expected.",
-                    preconditions=["System is available and accessible"],
-                    priority="Medium",
-                    parent_story_id=None
-                )
-                test_cases.append(test_case)
-                
-            if test_cases:
-                self.logger.info(f"Regex parsing extracted {len(test_cases)} test cases")
-                return test_cases
+        # Pattern for test case blocks; stop scanning after the first 10 matches
+        for i, title_match in enumerate(islice(_TEST_CASE_TITLE_RE.finditer(content), 10)):  # Limit to 10 test cases
+            title = title_match.group(1)
+            test_case = TestCase(
+                title=title.strip(),
+                description=f"Generated from AI response - Test case {i+1}",
+                test_type="positive",
+                test_steps=[f"Execute test scenario: {title.strip()}"],
+                expected_result="System behaves as expected.",
+                preconditions=["System is available and accessible"],
+                priority="Medium",
+                parent_story_id=None
+            )
+            test_cases.append(test_case)
+            
+        if test_cases:
+            self.logger.info(f"Regex parsing extracted {len(test_cases)} test cases")
+            return test_cases
 
         # Strategy 2: Simple text-based parsing (original fallback)
-        lines = content.split('\n')
         current_test = None
 
-        for line in lines:
+        for line in content.splitlines():
             line = line.strip()
             if not line:
                 continue
                 
             # Look for lines that might be titles
-            if any(keyword in line.lower() for keyword in ['title:', 'test:', 'tc', '1.', '2.', '3.', '4.', '5.']):
+            if _FALLBACK_TITLE_HINT_RE.search(line):
                 if current_test:
                     test_cases.append(current_test)
 
                 # Clean up the title
-                title = line
-                for prefix in ['Title:', 'Test:', 'TC', '1.', '2.', '3.', '4.', '5.']:
-                    if title.startswith(prefix):
-                        title = title[len(prefix):].strip()
-                        break
+                prefix_match = _FALLBACK_TITLE_PREFIX_RE.match(line)
+                title = line[prefix_match.end():].strip() if prefix_match else line
                 
                 if not title:
                     title = f"Test Case {len(test_cases) + 1}"
@@ -804,9 +977,9 @@ Gen comprehensive TCs with strong pos coverage."""
                     parent_story_id=None
                 )
             elif current_test and line:
-                if line.startswith('Steps:') or line.startswith('Expected:') or line.startswith('Description:'):
+                if line.startswith(('Steps:', 'Expected:', 'Description:')):
                     continue
-                elif line.startswith('-') or line.startswith('•') or line.startswith('*'):
+                elif line[:1] in ('-', '•', '*'):
                     current_test.test_steps.append(line[1:].strip())
                 elif len(current_test.test_steps) < 5:  # Add as a step if we don't have many yet
                     current_test.test_steps.append(line)
@@ -3,20 +3,50 @@ Token Usage Tracker for AI Calls
 Provides token usage analytics and TOON optimization metrics without additional API calls
 """
 
+import atexit
 import json
 import logging
 import os
+import queue
+import sys
 import threading
-from dataclasses import dataclass, asdict, field
-from datetime import datetime
+import time
+from dataclasses import dataclass, asdict, field, replace
+from datetime import date, datetime
 from pathlib import Path
 from typing import Dict, List, Optional
 from collections import deque
+from itertools import islice
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib json module
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# Slotted dataclasses (no per-instance __dict__) need Python 3.10+; older versions get regular ones
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+def _json_dumps(obj) -> str:
+    """Serialize to compact JSON, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(',', ':'))
+
+
+def _hour_key(moment: datetime) -> int:
+    """Integer key for the local hour containing `moment` (ordered like the hours themselves)"""
+    return moment.toordinal() * 24 + moment.hour
 
-@dataclass
+
+def _format_hour(key: int) -> str:
+    """Render an hour key as YYYY-MM-DDTHH, the prefix of the record timestamps"""
+    return f"{date.fromordinal(key // 24).isoformat()}T{key % 24:02d}"
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class TokenUsageRecord:
     """Record of token usage for a single AI call"""
     timestamp: str
@@ -34,9 +64,10 @@ class TokenUsageRecord:
     error_message: str = ""
     story_id: str = ""
     story_title: str = ""
+    epoch_seconds: float = 0.0  # timestamp as a Unix time; 0.0 for records logged before it was stored
     
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class TokenUsageStats:
     """Aggregated token usage statistics"""
     total_calls: int = 0
@@ -79,6 +110,22 @@ class TokenTracker:
     
     # TOON token reduction factor (based on analysis: ~57% reduction)
     TOON_REDUCTION_FACTOR = 0.571
+    TOON_KEEP_FACTOR = 1.0 - TOON_REDUCTION_FACTOR  # share of standard tokens a TOON prompt keeps
+    TOON_EXPAND_FACTOR = 1.0 / TOON_KEEP_FACTOR  # standard tokens per TOON token
+    TOON_REDUCTION_PERCENTAGE = TOON_REDUCTION_FACTOR * 100
+    
+    # estimate_tokens looks for JSON brackets only within this many leading characters
+    JSON_SNIFF_CHARS = 256
+    
+    # Stats are saved (and the record log flushed) every SAVE_INTERVAL calls
+    SAVE_INTERVAL = 10
+    # The background saver waits this long after a request so bursts coalesce into one write
+    SAVE_DEBOUNCE_SECONDS = 0.5
+    # The append-only record log is rewritten from memory once it grows past this many lines
+    RECORDS_LOG_COMPACT_LINES = 5000
+    
+    # Seconds a built dashboard payload is reused while no new usage is recorded
+    DASHBOARD_CACHE_TTL = 1.5
     
     def __new__(cls):
         if cls._instance is None:
@@ -94,47 +141,215 @@ class TokenTracker:
             
         self.logger = logging.getLogger(__name__)
         self.records: deque = deque(maxlen=1000)  # Keep last 1000 records
+        # Dict form of each record (parallel to self.records), built once since records never change
+        self._record_dicts: deque = deque(maxlen=1000)
+        # Scalar columns parallel to self.records, so aggregations scan plain values instead of records
+        self._epochs: deque = deque(maxlen=1000)
+        self._hours: deque = deque(maxlen=1000)  # _hour_key() of each timestamp
+        self._call_types: deque = deque(maxlen=1000)
+        self._total_tokens: deque = deque(maxlen=1000)
+        self._tokens_saved: deque = deque(maxlen=1000)
+        # Index of the first record from the last 24 hours; records are in insertion (= time) order
+        self._window_start = 0
+        # Hourly totals keyed by _hour_key(), updated as records enter and leave the records deque
+        self._hourly: Dict[int, Dict[str, int]] = {}
+        # Per-call-type totals over the records deque, updated as records enter and leave it
+        self._by_call_type: Dict[str, Dict[str, int]] = {}
+        # Model name -> resolved TOKEN_COSTS tier, so the substring scan runs once per model
+        self._model_tier_cache: Dict[str, Dict[str, float]] = {}
+        # Last dashboard payload; _dashboard_version changes whenever the data behind it does
+        self._dashboard_cache: Optional[Dict] = None
+        self._dashboard_cache_until = 0.0
+        self._dashboard_version = 0
         self.stats = TokenUsageStats()
         self.data_file = Path(os.environ.get('LOG_DIR', '/tmp/logs')) / 'token_usage.json'
+        self.records_file = self.data_file.with_suffix('.jsonl')  # one JSON record per line
         self.data_file.parent.mkdir(parents=True, exist_ok=True)
+        self._records_handle = None
+        self._records_file_lines = 0
+        self._records_appended = 0  # records ever appended to the log, to find those added during a compaction
+        self._records_generation = 0  # bumped whenever the log is rewritten in place
+        self._save_io_lock = threading.Lock()  # serializes savers; held without self._lock during file writes
+        self._toon_reduction_sum = 0.0  # running sum behind stats.average_reduction_percentage
         
         # Load existing data if available
         self._load_data()
+        
+        # Periodic saves run on a daemon thread; a pending request absorbs further ones
+        self._save_queue: queue.Queue = queue.Queue(maxsize=1)
+        self._save_thread = threading.Thread(target=self._save_worker, name='token-tracker-save', daemon=True)
+        self._save_thread.start()
+        # The saver is a daemon thread, so pending stats and buffered records are written at exit instead
+        atexit.register(self.close)
         self._initialized = True
         self.logger.info("TokenTracker initialized")
     
     def _load_data(self):
-        """Load token usage data from file"""
+        """Load token usage stats and the record log from disk"""
+        legacy_records = []
+        # Stats and records load independently so a damaged stats file doesn't drop the record log
         try:
             if self.data_file.exists():
                 with open(self.data_file, 'r') as f:
                     data = json.load(f)
-                    
-                # Load records
-                for record_data in data.get('records', [])[-1000:]:  # Keep last 1000
-                    record = TokenUsageRecord(**record_data)
-                    self.records.append(record)
                 
                 # Load stats
                 if 'stats' in data:
                     self.stats = TokenUsageStats(**data['stats'])
-                    
-                self.logger.info(f"Loaded {len(self.records)} token usage records")
+                    self._toon_reduction_sum = self.stats.average_reduction_percentage * self.stats.calls_with_toon
+                # Files written before the JSONL record log kept records here
+                legacy_records = data.get('records', [])
         except Exception as e:
-            self.logger.error(f"Failed to load token usage data: {e}")
+            self.logger.error(f"Failed to load token usage stats: {e}")
+        
+        try:
+            if self.records_file.exists():
+                # Stream the log; the deque's maxlen keeps only the last 1000 records
+                with open(self.records_file, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        self._records_file_lines += 1
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            self.records.append(TokenUsageRecord(**json.loads(line)))
+                        except (ValueError, TypeError):
+                            # Partial line from an interrupted write
+                            continue
+            elif legacy_records:
+                for record_data in legacy_records[-1000:]:  # Keep last 1000
+                    self.records.append(TokenUsageRecord(**record_data))
+            
+            for record in self.records:
+                self._append_columns(record, self._record_moment(record), asdict(record))
+                self._count_call_type(record.call_type, record.total_tokens, record.tokens_saved, 1)
+            
+            if legacy_records and not self.records_file.exists():
+                self._rewrite_records_file()
+                
+            self.logger.info(f"Loaded {len(self.records)} token usage records")
+        except Exception as e:
+            self.logger.error(f"Failed to load token usage records: {e}")
     
-    def _save_data(self):
-        """Save token usage data to file"""
+    @staticmethod
+    def _record_moment(record: TokenUsageRecord) -> Optional[datetime]:
+        """Local datetime of a loaded record; the ISO timestamp is parsed only for older records"""
+        if record.epoch_seconds:
+            return datetime.fromtimestamp(record.epoch_seconds)
         try:
-            data = {
-                'records': [asdict(r) for r in list(self.records)],
-                'stats': asdict(self.stats),
-                'last_updated': datetime.now().isoformat()
-            }
-            with open(self.data_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            return datetime.fromisoformat(record.timestamp)
+        except ValueError:
+            return None
+    
+    def _append_columns(self, record: TokenUsageRecord, moment: Optional[datetime], record_dict: Dict):
+        """Append a record's dict form and scalar columns alongside self.records"""
+        if moment is None:
+            # Unparseable timestamps fall outside the 24h window
+            epoch, hour = 0.0, 0
+        else:
+            epoch, hour = record.epoch_seconds or moment.timestamp(), _hour_key(moment)
+        self._record_dicts.append(record_dict)
+        self._epochs.append(epoch)
+        self._hours.append(hour)
+        self._count_hour(hour, record.total_tokens, record.tokens_saved, 1)
+        self._call_types.append(record.call_type)
+        self._total_tokens.append(record.total_tokens)
+        self._tokens_saved.append(record.tokens_saved)
+    
+    def _append_record(self, record_dict: Dict):
+        """Append one record to the JSONL log (the handle is opened once and kept)"""
+        try:
+            if self._records_handle is None:
+                self._records_handle = open(self.records_file, 'a', encoding='utf-8')
+            self._records_appended += 1
+            self._records_handle.write(_json_dumps(record_dict) + "\n")
+            self._records_file_lines += 1
         except Exception as e:
-            self.logger.error(f"Failed to save token usage data: {e}")
+            self.logger.error(f"Failed to append token usage record: {e}")
+    
+    def _rewrite_records_file(self):
+        """Replace the record log with the in-memory records, dropping older lines"""
+        if self._records_handle is not None:
+            self._records_handle.close()
+            self._records_handle = None
+        tmp_file = self.records_file.with_suffix('.jsonl.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            for record_dict in self._record_dicts:
+                f.write(_json_dumps(record_dict) + "\n")
+        os.replace(tmp_file, self.records_file)
+        self._records_file_lines = len(self.records)
+        self._records_generation += 1
+    
+    def _save_data(self):
+        """
+        Flush the record log and save the aggregated stats.
+        State is snapshotted under self._lock and the files are written after releasing it,
+        so record_usage never waits on disk I/O; call without holding self._lock.
+        """
+        with self._save_io_lock:
+            try:
+                with self._lock:
+                    if self._records_handle is not None:
+                        self._records_handle.flush()
+                    data = {
+                        'stats': asdict(self.stats),
+                        'last_updated': datetime.now().isoformat()
+                    }
+                    compact = self._records_file_lines > self.RECORDS_LOG_COMPACT_LINES
+                    if compact:
+                        record_dicts = list(self._record_dicts)
+                        appended = self._records_appended
+                        generation = self._records_generation
+                
+                if compact:
+                    self._compact_records_file(record_dicts, appended, generation)
+                
+                # Write then rename, so an exit mid-write never leaves a truncated stats file
+                tmp_file = self.data_file.with_suffix('.json.tmp')
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    f.write(_json_dumps(data))
+                os.replace(tmp_file, self.data_file)
+            except Exception as e:
+                self.logger.error(f"Failed to save token usage data: {e}")
+    
+    def _compact_records_file(self, record_dicts: List[Dict], appended: int, generation: int):
+        """Rewrite the record log from a snapshot outside the lock, then swap it in under the lock"""
+        tmp_file = self.records_file.with_suffix('.jsonl.compact')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            for record_dict in record_dicts:
+                f.write(_json_dumps(record_dict) + "\n")
+        
+        with self._lock:
+            if self._records_generation != generation:
+                # The log was rewritten (e.g. cleared) meanwhile; the snapshot is stale
+                os.remove(tmp_file)
+                return
+            # Records appended while the snapshot was being written
+            missed = self._records_appended - appended
+            if missed:
+                with open(tmp_file, 'a', encoding='utf-8') as f:
+                    for record_dict in list(self._record_dicts)[-missed:]:
+                        f.write(_json_dumps(record_dict) + "\n")
+            if self._records_handle is not None:
+                self._records_handle.close()
+                self._records_handle = None
+            os.replace(tmp_file, self.records_file)
+            self._records_file_lines = len(record_dicts) + min(missed, len(self._record_dicts))
+            self._records_generation += 1
+    
+    def _request_save(self):
+        """Ask the background saver to write the stats (no-op if a save is already pending)"""
+        try:
+            self._save_queue.put_nowait(None)
+        except queue.Full:
+            pass
+    
+    def _save_worker(self):
+        """Background loop performing debounced saves off the record_usage path"""
+        while True:
+            self._save_queue.get()
+            time.sleep(self.SAVE_DEBOUNCE_SECONDS)
+            self._save_data()
     
     def estimate_tokens(self, text: str) -> int:
         """
@@ -145,11 +360,12 @@ class TokenTracker:
         if not text:
             return 0
         # Average ~4 characters per token for English text
-        # Adjust for code/JSON which tends to have more tokens per character
-        char_count = len(text)
-        if '{' in text or '[' in text:  # JSON-like content
-            return max(1, char_count // 3)
-        return max(1, char_count // 4)
+        # Adjust for code/JSON which tends to have more tokens per character;
+        # JSON-like content is recognised from its opening characters instead of scanning the whole text
+        head = text[:self.JSON_SNIFF_CHARS]
+        if '{' in head or '[' in head:  # JSON-like content
+            return max(1, len(text) // 3)
+        return max(1, len(text) // 4)
     
     def record_usage(
         self,
@@ -177,19 +393,21 @@ class TokenTracker:
             # Calculate TOON savings
             if toon_enabled:
                 # When TOON is enabled, estimate what standard would have used
-                estimated_standard_tokens = int(prompt_tokens / (1 - self.TOON_REDUCTION_FACTOR))
+                estimated_standard_tokens = int(prompt_tokens * self.TOON_EXPAND_FACTOR)
                 tokens_saved = estimated_standard_tokens - prompt_tokens
-                reduction_percentage = self.TOON_REDUCTION_FACTOR * 100
+                reduction_percentage = self.TOON_REDUCTION_PERCENTAGE
             else:
                 # When TOON is disabled, estimate what TOON would have saved
                 estimated_standard_tokens = prompt_tokens
-                potential_toon_tokens = int(prompt_tokens * (1 - self.TOON_REDUCTION_FACTOR))
+                potential_toon_tokens = int(prompt_tokens * self.TOON_KEEP_FACTOR)
                 tokens_saved = 0  # No savings since TOON wasn't used
                 reduction_percentage = 0.0
             
             # Create record
+            now = datetime.now()
             record = TokenUsageRecord(
-                timestamp=datetime.now().isoformat(),
+                timestamp=now.isoformat(),
+                epoch_seconds=now.timestamp(),
                 call_type=call_type,
                 prompt_tokens=prompt_tokens,
                 completion_tokens=completion_tokens,
@@ -206,15 +424,24 @@ class TokenTracker:
                 story_title=story_title
             )
             
-            # Add to records
+            # Add to records; a full deque drops its oldest record, which leaves the call-type totals
+            if len(self.records) == self.records.maxlen:
+                self._count_call_type(self._call_types[0], self._total_tokens[0], self._tokens_saved[0], -1)
+                self._count_hour(self._hours[0], self._total_tokens[0], self._tokens_saved[0], -1)
+                if self._window_start:
+                    self._window_start -= 1
             self.records.append(record)
+            record_dict = asdict(record)
+            self._append_columns(record, now, record_dict)
+            self._append_record(record_dict)
+            self._invalidate_dashboard()
             
             # Update stats
             self._update_stats(record)
             
-            # Save data periodically (every 10 records)
-            if len(self.records) % 10 == 0:
-                self._save_data()
+            # Save stats periodically; counted by calls since the records deque stops growing at 1000
+            if self.stats.total_calls % self.SAVE_INTERVAL == 0:
+                self._request_save()
             
             self.logger.debug(f"Recorded token usage: {total_tokens} tokens, TOON: {toon_enabled}")
             return record
@@ -239,6 +466,8 @@ class TokenTracker:
         
         if record.toon_enabled:
             self.stats.calls_with_toon += 1
+            self._toon_reduction_sum += record.reduction_percentage
+            self.stats.average_reduction_percentage = self._toon_reduction_sum / self.stats.calls_with_toon
         else:
             self.stats.calls_without_toon += 1
         
@@ -247,31 +476,51 @@ class TokenTracker:
         elif record.call_type == 'test_case_extraction':
             self.stats.test_case_extractions += 1
         
-        # Update average reduction percentage
-        if self.stats.calls_with_toon > 0:
-            toon_records = [r for r in self.records if r.toon_enabled]
-            if toon_records:
-                self.stats.average_reduction_percentage = sum(
-                    r.reduction_percentage for r in toon_records
-                ) / len(toon_records)
+        self._count_call_type(record.call_type, record.total_tokens, record.tokens_saved, 1)
         
         # Estimate costs
         self._update_cost_estimates(record)
     
+    def _count_call_type(self, call_type: str, total_tokens: int, tokens_saved: int, sign: int):
+        """Add (sign=1) or remove (sign=-1) a record from the per-call-type totals"""
+        totals = self._by_call_type.get(call_type)
+        if totals is None:
+            totals = self._by_call_type[call_type] = {'total_calls': 0, 'total_tokens': 0, 'tokens_saved': 0}
+        totals['total_calls'] += sign
+        totals['total_tokens'] += sign * total_tokens
+        totals['tokens_saved'] += sign * tokens_saved
+        if totals['total_calls'] <= 0:
+            del self._by_call_type[call_type]
+    
+    def _count_hour(self, hour: int, total_tokens: int, tokens_saved: int, sign: int):
+        """Add (sign=1) or remove (sign=-1) a record from its hourly bucket"""
+        bucket = self._hourly.get(hour)
+        if bucket is None:
+            if sign < 0:
+                return  # bucket already aged out of the 24h view
+            bucket = self._hourly[hour] = {'tokens': 0, 'saved': 0, 'calls': 0}
+        bucket['tokens'] += sign * total_tokens
+        bucket['saved'] += sign * tokens_saved
+        bucket['calls'] += sign
+        if bucket['calls'] <= 0:
+            del self._hourly[hour]
+    
     def _update_cost_estimates(self, record: TokenUsageRecord):
         """Update cost estimates based on model pricing"""
-        model_lower = record.model.lower()
-        
-        # Find matching cost tier
-        cost_tier = None
-        for tier_name, costs in self.TOKEN_COSTS.items():
-            if tier_name in model_lower:
-                cost_tier = costs
-                break
-        
-        if not cost_tier:
-            # Default to GPT-4 pricing for unknown models
-            cost_tier = self.TOKEN_COSTS['gpt-4']
+        cost_tier = self._model_tier_cache.get(record.model)
+        if cost_tier is None:
+            model_lower = record.model.lower()
+            
+            # Find matching cost tier
+            for tier_name, costs in self.TOKEN_COSTS.items():
+                if tier_name in model_lower:
+                    cost_tier = costs
+                    break
+            
+            if not cost_tier:
+                # Default to GPT-4 pricing for unknown models
+                cost_tier = self.TOKEN_COSTS['gpt-4']
+            self._model_tier_cache[record.model] = cost_tier
         
         # Calculate actual cost (with TOON)
         input_cost = (record.prompt_tokens / 1000) * cost_tier['input']
@@ -293,96 +542,114 @@ class TokenTracker:
     def get_stats(self) -> Dict:
         """Get current token usage statistics"""
         with self._lock:
-            return asdict(self.stats)
+            stats = replace(self.stats)
+        return asdict(stats)
     
     def get_recent_records(self, limit: int = 50) -> List[Dict]:
-        """Get recent token usage records"""
+        """Get recent token usage records (shared cached dicts; callers must not modify them)"""
         with self._lock:
-            recent = list(self.records)[-limit:]
-            return [asdict(r) for r in reversed(recent)]
+            recent = list(self._record_dicts)[-limit:]
+        recent.reverse()
+        return recent
+    
+    def _invalidate_dashboard(self):
+        """Drop the cached dashboard payload (call with the lock held)"""
+        self._dashboard_version += 1
+        self._dashboard_cache = None
     
     def get_dashboard_data(self) -> Dict:
-        """Get comprehensive data for the token dashboard"""
+        """
+        Get comprehensive data for the token dashboard.
+        The payload is reused for DASHBOARD_CACHE_TTL seconds unless usage is recorded in between;
+        each caller gets its own top-level dict, but the nested values are shared and must not be modified.
+        """
+        # Snapshot under the lock, then aggregate without blocking record_usage
         with self._lock:
+            if self._dashboard_cache is not None and time.monotonic() < self._dashboard_cache_until:
+                return dict(self._dashboard_cache)
+            version = self._dashboard_version
             # Get records from last 24 hours
-            now = datetime.now()
-            recent_records = []
-            for record in self.records:
-                try:
-                    record_time = datetime.fromisoformat(record.timestamp)
-                    hours_ago = (now - record_time).total_seconds() / 3600
-                    if hours_ago <= 24:
-                        recent_records.append(record)
-                except:
-                    pass
-            
-            # Calculate hourly breakdown
-            hourly_usage = {}
-            for record in recent_records:
-                hour = record.timestamp[:13]  # YYYY-MM-DDTHH
-                if hour not in hourly_usage:
-                    hourly_usage[hour] = {
-                        'tokens': 0,
-                        'saved': 0,
-                        'calls': 0
-                    }
-                hourly_usage[hour]['tokens'] += record.total_tokens
-                hourly_usage[hour]['saved'] += record.tokens_saved
-                hourly_usage[hour]['calls'] += 1
-            
-            # Calculate by call type
-            by_call_type = {}
-            for record in list(self.records):
-                if record.call_type not in by_call_type:
-                    by_call_type[record.call_type] = {
-                        'total_calls': 0,
-                        'total_tokens': 0,
-                        'tokens_saved': 0,
-                        'avg_tokens': 0
-                    }
-                by_call_type[record.call_type]['total_calls'] += 1
-                by_call_type[record.call_type]['total_tokens'] += record.total_tokens
-                by_call_type[record.call_type]['tokens_saved'] += record.tokens_saved
-            
-            # Calculate averages
-            for call_type in by_call_type:
-                if by_call_type[call_type]['total_calls'] > 0:
-                    by_call_type[call_type]['avg_tokens'] = (
-                        by_call_type[call_type]['total_tokens'] / 
-                        by_call_type[call_type]['total_calls']
-                    )
-            
-            # TOON effectiveness
-            toon_stats = {
-                'enabled_calls': self.stats.calls_with_toon,
-                'disabled_calls': self.stats.calls_without_toon,
-                'total_tokens_saved': self.stats.total_tokens_saved,
-                'average_reduction': self.stats.average_reduction_percentage,
-                'estimated_savings_usd': round(self.stats.estimated_savings_usd, 4)
-            }
-            
-            return {
-                'stats': asdict(self.stats),
-                'recent_records': [asdict(r) for r in list(recent_records)[-20:]],
-                'hourly_usage': hourly_usage,
-                'by_call_type': by_call_type,
-                'toon_stats': toon_stats,
-                'toon_enabled': self.stats.calls_with_toon > 0,
-                'last_updated': datetime.now().isoformat()
-            }
+            cutoff = time.time() - 86400
+            start = self._window_start
+            end = len(self._epochs)
+            while start < end and self._epochs[start] < cutoff:
+                start += 1
+            self._window_start = start
+            # Age out hourly buckets older than the 24h window
+            cutoff_hour = _hour_key(datetime.fromtimestamp(cutoff))
+            for hour in [hour for hour in self._hourly if hour < cutoff_hour]:
+                del self._hourly[hour]
+            hourly_buckets = [(hour, dict(bucket)) for hour, bucket in self._hourly.items()]
+            recent_record_dicts = list(islice(self._record_dicts, max(start, end - 20), None))
+            stats = replace(self.stats)
+            call_type_totals = {call_type: dict(totals) for call_type, totals in self._by_call_type.items()}
+        
+        # Hourly breakdown, keyed by YYYY-MM-DDTHH
+        hourly_usage = {_format_hour(hour): bucket for hour, bucket in hourly_buckets}
+        
+        # By call type, from the incrementally maintained totals
+        by_call_type = {
+            call_type: {**totals, 'avg_tokens': totals['total_tokens'] / totals['total_calls']}
+            for call_type, totals in call_type_totals.items()
+        }
+        
+        # TOON effectiveness
+        toon_stats = {
+            'enabled_calls': stats.calls_with_toon,
+            'disabled_calls': stats.calls_without_toon,
+            'total_tokens_saved': stats.total_tokens_saved,
+            'average_reduction': stats.average_reduction_percentage,
+            'estimated_savings_usd': round(stats.estimated_savings_usd, 4)
+        }
+        
+        dashboard = {
+            'stats': asdict(stats),
+            'recent_records': recent_record_dicts,
+            'hourly_usage': hourly_usage,
+            'by_call_type': by_call_type,
+            'toon_stats': toon_stats,
+            'toon_enabled': stats.calls_with_toon > 0,
+            'last_updated': datetime.now().isoformat()
+        }
+        
+        with self._lock:
+            # Only cache if nothing was recorded while the payload was being built
+            if self._dashboard_version == version:
+                self._dashboard_cache = dashboard
+                self._dashboard_cache_until = time.monotonic() + self.DASHBOARD_CACHE_TTL
+        return dict(dashboard)
     
     def clear_data(self):
         """Clear all token usage data"""
         with self._lock:
             self.records.clear()
+            for column in (self._record_dicts, self._epochs, self._hours,
+                           self._call_types, self._total_tokens, self._tokens_saved):
+                column.clear()
+            self._window_start = 0
+            self._hourly.clear()
+            self._invalidate_dashboard()
+            self._by_call_type.clear()
             self.stats = TokenUsageStats()
-            self._save_data()
-            self.logger.info("Token usage data cleared")
+            self._toon_reduction_sum = 0.0
+            try:
+                self._rewrite_records_file()
+            except Exception as e:
+                self.logger.error(f"Failed to clear token usage records: {e}")
+        self._save_data()
+        self.logger.info("Token usage data cleared")
     
-    def force_save(self):
-        """Force save current data to file"""
+    def close(self):
+        """Save the stats and close the record log (registered to run at interpreter exit)"""
+        self._save_data()
         with self._lock:
-            self._save_data()
+            if self._records_handle is not None:
+                self._records_handle.close()
+                self._records_handle = None
+    
+    def force_save(self):
+        """Force save current data to file (synchronously, e.g. at shutdown)"""
+        self._save_data()
 
 
 # Global instance accessor
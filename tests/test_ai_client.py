@@ -0,0 +1,55 @@
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.ai_client import BaseAIClient
+
+
+class _StatusError(Exception):
+    """Stand-in for the OpenAI SDK's APIStatusError, which exposes the HTTP status as status_code"""
+
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+@pytest.fixture
+def client():
+    client = BaseAIClient()
+    client.max_retries = 3
+    client.retry_delay = 1
+    return client
+
+
+class TestRetryRequest:
+    def test_bad_request_fails_without_retry(self, client):
+        """A 400 cannot succeed on another attempt, so it is raised immediately"""
+        func = Mock(side_effect=_StatusError(400))
+
+        with patch('src.ai_client.time.sleep') as mock_sleep:
+            with pytest.raises(_StatusError):
+                client._retry_request(func)
+
+        assert func.call_count == 1
+        mock_sleep.assert_not_called()
+
+    @pytest.mark.parametrize('status_code', [408, 409, 429])
+    def test_transient_client_errors_are_retried(self, client, status_code):
+        """Timeouts, conflicts and rate limits are retried until max_retries is exhausted"""
+        func = Mock(side_effect=_StatusError(status_code))
+
+        with patch('src.ai_client.time.sleep') as mock_sleep:
+            with pytest.raises(_StatusError):
+                client._retry_request(func)
+
+        assert func.call_count == client.max_retries
+        assert mock_sleep.call_count == client.max_retries - 1
+
+    def test_retry_succeeds_after_transient_error(self, client):
+        """A rate-limited attempt followed by a success returns the result"""
+        func = Mock(side_effect=[_StatusError(429), 'ok'])
+
+        with patch('src.ai_client.time.sleep'):
+            assert client._retry_request(func) == 'ok'
+
+        assert func.call_count == 2
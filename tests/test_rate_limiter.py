@@ -0,0 +1,50 @@
+import time
+from unittest.mock import patch
+
+from src.rate_limiter import TokenBucket, AIRateLimiter
+
+
+class TestTokenBucket:
+    def test_acquire_within_capacity_does_not_wait(self):
+        """Requests within the bucket capacity are granted immediately"""
+        bucket = TokenBucket(capacity=10, refill_per_sec=1)
+
+        with patch('src.rate_limiter.time.sleep') as mock_sleep:
+            assert bucket.acquire(4) == 0.0
+            assert bucket.acquire(6) == 0.0
+
+        mock_sleep.assert_not_called()
+
+    def test_acquire_waits_for_refill(self):
+        """An empty bucket blocks until enough tokens have been refilled"""
+        bucket = TokenBucket(capacity=2, refill_per_sec=100)
+        bucket.acquire(2)
+
+        start = time.monotonic()
+        waited = bucket.acquire(1)
+
+        assert waited > 0
+        assert time.monotonic() - start >= 0.005
+
+    def test_oversize_request_is_clamped_to_capacity(self):
+        """A request larger than the bucket is clamped instead of blocking forever"""
+        bucket = TokenBucket(capacity=5, refill_per_sec=1)
+
+        assert bucket.acquire(50) == 0.0
+
+
+class TestAIRateLimiter:
+    def test_disabled_without_limits(self):
+        """No buckets are created when limits are zero"""
+        limiter = AIRateLimiter()
+
+        assert limiter.enabled is False
+        assert limiter.acquire(1000) == 0.0
+
+    def test_enabled_with_limits(self):
+        """Configured limits create RPM and TPM buckets"""
+        limiter = AIRateLimiter(requests_per_minute=60, tokens_per_minute=90000)
+
+        assert limiter.enabled is True
+        assert limiter.rpm_bucket.capacity == 60
+        assert limiter.tpm_bucket.refill_per_sec == 1500
@@ -0,0 +1,45 @@
+from unittest.mock import patch
+
+from src.response_cache import ResponseCache
+
+
+class TestResponseCache:
+    def test_make_key_is_deterministic(self):
+        """Identical requests produce the same key; any differing input changes it"""
+        key = ResponseCache.make_key("system", "user", "gpt-4", 0.3)
+
+        assert key == ResponseCache.make_key("system", "user", "gpt-4", 0.3)
+        assert key != ResponseCache.make_key("system", "user", "gpt-4", 0.7)
+        assert key != ResponseCache.make_key("system", "other", "gpt-4", 0.3)
+        assert key != ResponseCache.make_key("systemuser", "", "gpt-4", 0.3)
+
+    def test_memory_backend_round_trip(self):
+        """Without Redis, responses are cached in process"""
+        cache = ResponseCache()
+
+        assert cache.get("missing") is None
+        cache.set("key", '{"stories": []}')
+        assert cache.get("key") == '{"stories": []}'
+
+    def test_memory_backend_expires_entries(self):
+        """Entries are dropped once their TTL has passed"""
+        cache = ResponseCache(ttl=10)
+
+        with patch('src.response_cache.time.monotonic', return_value=100.0):
+            cache.set("key", "value")
+        with patch('src.response_cache.time.monotonic', return_value=111.0):
+            assert cache.get("key") is None
+
+    def test_memory_backend_evicts_least_recently_used(self):
+        """The in-process cache is bounded"""
+        cache = ResponseCache()
+
+        with patch.object(ResponseCache, 'MAX_MEMORY_ENTRIES', 2):
+            cache.set("a", "1")
+            cache.set("b", "2")
+            cache.get("a")
+            cache.set("c", "3")
+
+        assert cache.get("a") == "1"
+        assert cache.get("b") is None
+        assert cache.get("c") == "3"
@@ -1,5 +1,6 @@
 import pytest
 from unittest.mock import Mock, patch, MagicMock
+import asyncio
 import json
 
 from src.story_extractor import StoryExtractor
@@ -159,3 +160,113 @@ class TestStoryExtractor:
         assert call_args[1]['model'] == 'gpt-4'
         assert call_args[1]['temperature'] == 0.3
         assert len(call_args[1]['messages']) == 2
+
+
+@pytest.fixture
+def mocked_extractor():
+    """Create a StoryExtractor with a mocked AI client"""
+    with patch('src.story_extractor.get_ai_client') as mock_get_client, \
+         patch('src.enhanced_story_creator.get_ai_client'):
+        mock_get_client.return_value = MagicMock(model_name='gpt-4')
+        return StoryExtractor()
+
+
+class TestOversizeRequirementChunking:
+    @pytest.fixture
+    def extractor(self, mocked_extractor):
+        return mocked_extractor
+
+    def test_small_requirement_is_sent_whole(self, extractor):
+        """A requirement that fits the context window is analyzed in one call"""
+        requirement = Requirement(id="1", title="Logout", description="Add a logout button.", state="Active")
+
+        with patch.object(extractor, '_analyze_requirement_with_ai', return_value=[]) as mock_analyze:
+            extractor._analyze_requirement_in_chunks(requirement)
+
+        mock_analyze.assert_called_once()
+        assert mock_analyze.call_args[0][0].description == requirement.description
+        assert mock_analyze.call_args.kwargs['prompt']
+        assert mock_analyze.call_args.kwargs['system_prompt']
+
+    def test_oversize_requirement_is_split_by_paragraph(self, extractor):
+        """An oversize requirement is split into paragraph chunks before calling the AI"""
+        paragraphs = [f"Paragraph {i} " + "word " * 40 for i in range(4)]
+        requirement = Requirement(id="2", title="Big", description="\n\n".join(paragraphs), state="Active")
+
+        with patch('src.story_extractor._MODEL_CONTEXT_LIMITS', {'gpt-4': 3470}), \
+             patch.object(extractor, '_count_tokens', side_effect=lambda text: len(text) // 4), \
+             patch.object(extractor, '_analyze_requirement_with_ai', return_value=[]) as mock_analyze:
+            extractor._analyze_requirement_in_chunks(requirement)
+
+        chunks = [call[0][0].description for call in mock_analyze.call_args_list]
+        assert len(chunks) > 1
+        assert "".join(chunks).replace("\n", "") == "".join(paragraphs)
+
+    def test_configured_context_window_overrides_model_name(self, extractor):
+        """AI_CONTEXT_WINDOW_TOKENS takes precedence over the model-name lookup"""
+        with patch('src.story_extractor.Settings.AI_CONTEXT_WINDOW_TOKENS', 200000, create=True):
+            assert extractor._get_context_limit() == 200000
+        with patch('src.story_extractor.Settings.AI_CONTEXT_WINDOW_TOKENS', 0, create=True):
+            extractor.ai_client.model_name = 'gpt-4.1-mini'
+            assert extractor._get_context_limit() == 1047576
+
+    def test_unsplittable_oversize_requirement_fails_fast(self, extractor):
+        """A single oversize paragraph is rejected without calling the AI"""
+        requirement = Requirement(id="3", title="Huge", description="word " * 5000, state="Active")
+
+        with patch.object(extractor, '_analyze_requirement_with_ai') as mock_analyze:
+            with pytest.raises(Exception, match="too large"):
+                extractor._analyze_requirement_in_chunks(requirement)
+
+        mock_analyze.assert_not_called()
+
+
+class TestTrivialRequirementFastPath:
+    @patch('src.story_extractor.Settings.STORY_FAST_PATH_ENABLED', True)
+    def test_trivial_requirement_skips_ai(self, mocked_extractor):
+        """A small, low-complexity requirement is templated without an AI call"""
+        requirement = Requirement(
+            id="10",
+            title="Display logout button",
+            description="Display a logout button in the header so users can view and use it.",
+            state="Active"
+        )
+
+        result = mocked_extractor.extract_stories(requirement)
+
+        assert result.extraction_successful is True
+        assert len(result.stories) == 1
+        assert result.stories[0].heading == "Display logout button"
+        assert result.stories[0].complexity_analysis.story_points == 1
+        mocked_extractor.ai_client.chat_completion.assert_not_called()
+
+    def test_fast_path_is_opt_in(self, mocked_extractor):
+        """The fast path is skipped unless enabled in settings"""
+        context = {'complexity': 'low', 'scope': 'small', 'functional_areas': []}
+
+        with patch('src.story_extractor.Settings.STORY_FAST_PATH_ENABLED', False):
+            assert mocked_extractor._is_trivial_requirement(context) is False
+        with patch('src.story_extractor.Settings.STORY_FAST_PATH_ENABLED', True):
+            assert mocked_extractor._is_trivial_requirement(context) is True
+            assert mocked_extractor._is_trivial_requirement({**context, 'complexity': 'high'}) is False
+
+
+class TestAsyncExtraction:
+    def test_extract_many_preserves_order(self, mocked_extractor):
+        """extract_many returns one result per requirement, in input order"""
+        requirements = [
+            Requirement(id=str(i), title=f"Requirement {i}", description="Description", state="Active")
+            for i in range(5)
+        ]
+
+        def fake_extract(requirement, existing_stories=None):
+            return StoryExtractionResult(
+                requirement_id=requirement.id,
+                requirement_title=requirement.title,
+                stories=[]
+            )
+
+        with patch.object(mocked_extractor, 'extract_stories', side_effect=fake_extract):
+            results = asyncio.run(mocked_extractor.extract_many(requirements, concurrency=2))
+
+        assert [r.requirement_id for r in results] == ["0", "1", "2", "3", "4"]
@@ -0,0 +1,216 @@
+import pytest
+from unittest.mock import patch, MagicMock
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import src.test_case_extractor as test_case_extractor_module
+from src.test_case_extractor import TestCaseExtractor
+from src.models import UserStory
+
+
+@pytest.fixture
+def extractor():
+    """Create a TestCaseExtractor with a mocked AI client"""
+    with patch('src.test_case_extractor.get_ai_client') as mock_get_client:
+        mock_get_client.return_value = MagicMock(model_name='gpt-4')
+        return TestCaseExtractor()
+
+
+@pytest.fixture
+def stories():
+    """Sample user stories for testing"""
+    return [
+        UserStory(
+            heading=f"Story {i}",
+            description=f"As a user, I want feature {i} so that I benefit",
+            acceptance_criteria=[f"Feature {i} works"]
+        )
+        for i in range(1, 4)
+    ]
+
+
+def _toon_tc(title):
+    return {"t": title, "desc": "d", "type": "pos", "prio": "High", "steps": ["1.Do"], "exp": "Done", "prereq": ""}
+
+
+class TestBatchExtraction:
+    @patch('src.test_case_extractor.Settings.AI_MAX_COMPLETION_TOKENS', 16384, create=True)
+    def test_batch_uses_single_ai_call(self, extractor, stories):
+        """Several small stories are extracted with one AI call"""
+        extractor.ai_client.chat_completion.return_value = json.dumps({
+            "results": [{"story_id": i, "tcs": [_toon_tc(f"Verify story {i}")]} for i in range(1, 4)]
+        })
+
+        results = extractor.extract_test_cases_batch(stories, ["11", "12", "13"])
+
+        assert extractor.ai_client.chat_completion.call_count == 1
+        assert [r.story_id for r in results] == ["11", "12", "13"]
+        assert [r.test_cases[0].title for r in results] == ["Verify story 1", "Verify story 2", "Verify story 3"]
+        assert results[1].test_cases[0].parent_story_id == "12"
+
+    @patch('src.test_case_extractor.Settings.AI_MAX_COMPLETION_TOKENS', 16384, create=True)
+    def test_missing_story_falls_back_to_single_call(self, extractor, stories):
+        """A story missing from the batch response is extracted individually"""
+        batch_response = json.dumps({
+            "results": [{"story_id": 1, "tcs": [_toon_tc("Verify story 1")]},
+                        {"story_id": 2, "tcs": [_toon_tc("Verify story 2")]}]
+        })
+        single_response = json.dumps({"tcs": [_toon_tc("Verify story 3 alone")]})
+        extractor.ai_client.chat_completion.side_effect = [batch_response, single_response]
+
+        results = extractor.extract_test_cases_batch(stories)
+
+        assert extractor.ai_client.chat_completion.call_count == 2
+        assert results[2].test_cases[0].title == "Verify story 3 alone"
+
+    @patch('src.test_case_extractor.Settings.AI_MAX_COMPLETION_TOKENS', 4096, create=True)
+    def test_batches_fit_the_model_completion_limit(self, extractor, stories):
+        """With a 4096-token output cap, batches shrink and max_tokens never exceeds the cap"""
+        extractor.ai_client.chat_completion.side_effect = [
+            json.dumps({"results": [{"story_id": i, "tcs": [_toon_tc(f"Verify story {i}")]} for i in (1, 2)]}),
+            json.dumps({"tcs": [_toon_tc("Verify story 3")]})
+        ]
+
+        results = extractor.extract_test_cases_batch(stories)
+
+        max_tokens = [call.kwargs['max_tokens'] for call in extractor.ai_client.chat_completion.call_args_list]
+        assert len(max_tokens) == 2
+        assert all(tokens <= 4096 for tokens in max_tokens)
+        assert [r.test_cases[0].title for r in results] == ["Verify story 1", "Verify story 2", "Verify story 3"]
+
+
+class TestResponseParsing:
+    def test_braces_inside_strings_and_trailing_text(self, extractor):
+        """Braces inside JSON strings and text after the object don't break parsing"""
+        response = 'Here you go:\n' + json.dumps({
+            "tcs": [_toon_tc("Verify template {name} renders }")]
+        }) + '\nLet me know if you need more {details}.'
+
+        test_cases = extractor._parse_test_cases_response(response)
+
+        assert len(test_cases) == 1
+        assert test_cases[0].title == "Verify template {name} renders }"
+
+
+class TestResponseCaching:
+    def test_repeated_story_is_served_from_cache(self, extractor, stories):
+        """A second extraction of the same story skips the AI call when caching is enabled"""
+        from src.response_cache import ResponseCache
+
+        extractor.ai_client.chat_completion.return_value = json.dumps({"tcs": [_toon_tc("Verify story 1")]})
+
+        with patch('src.test_case_extractor.get_response_cache', return_value=ResponseCache()):
+            first = extractor.extract_test_cases(stories[0], "11")
+            second = extractor.extract_test_cases(stories[0], "11")
+
+        assert extractor.ai_client.chat_completion.call_count == 1
+        assert second.extraction_successful
+        assert [tc.title for tc in second.test_cases] == [tc.title for tc in first.test_cases]
+
+    def test_text_fallback_results_are_not_cached(self, extractor, stories):
+        """Test cases scraped from a non-JSON response are not replayed from the cache"""
+        from src.response_cache import ResponseCache
+
+        extractor.ai_client.chat_completion.return_value = "Test Case: Verify login works"
+        cache = ResponseCache()
+
+        with patch('src.test_case_extractor.get_response_cache', return_value=cache):
+            result = extractor.extract_test_cases(stories[0], "11")
+            extractor.extract_test_cases(stories[0], "11")
+
+        assert result.test_cases[0].title == "Verify login works"
+        assert extractor.ai_client.chat_completion.call_count == 2
+        assert len(cache._memory) == 0
+
+
+class TestStreamingExtraction:
+    def test_iter_yields_all_streamed_test_cases(self, extractor, stories):
+        """extract_test_cases_iter yields every test case from a chunked, fenced response"""
+        response = "```json\n" + json.dumps({
+            "tcs": [_toon_tc("Verify first"), _toon_tc("Verify second")]
+        }) + "\n```"
+        chunks = [response[i:i + 7] for i in range(0, len(response), 7)]
+        extractor.ai_client.chat_completion_stream.return_value = iter(chunks)
+
+        test_cases = list(extractor.extract_test_cases_iter(stories[0], "11"))
+
+        assert [tc.title for tc in test_cases] == ["Verify first", "Verify second"]
+        extractor.ai_client.chat_completion.assert_not_called()
+
+    @pytest.mark.skipif(test_case_extractor_module.ijson is None, reason="incremental parsing needs ijson")
+    def test_truncated_stream_keeps_only_streamed_test_cases(self, extractor, stories):
+        """A stream cut off mid-JSON yields the complete test cases, without text-scraped extras"""
+        response = json.dumps({"tcs": [_toon_tc("TC1 verify first"), _toon_tc("TC2 verify second")]}, indent=2)
+        truncated = response[:response.index('"TC2 verify second"') + 30]
+        chunks = [truncated[i:i + 7] for i in range(0, len(truncated), 7)]
+        extractor.ai_client.chat_completion_stream.return_value = iter(chunks)
+
+        test_cases = list(extractor.extract_test_cases_iter(stories[0], "11"))
+
+        assert [tc.title for tc in test_cases] == ["TC1 verify first"]
+
+
+class TestEmptyStory:
+    def test_empty_story_skips_ai_call(self, extractor):
+        """A story without description or acceptance criteria returns the manual placeholder"""
+        story = UserStory(heading="Stub story", description="   ", acceptance_criteria=[])
+
+        result = extractor.extract_test_cases(story, "42")
+
+        extractor.ai_client.chat_completion.assert_not_called()
+        assert not result.extraction_successful
+        assert result.test_cases[0].title == "Manual Validation Required"
+        assert result.test_cases[0].parent_story_id == "42"
+
+
+class TestStoryContext:
+    def test_user_types_keep_first_mentioned_order(self, extractor):
+        """User types are returned in the order they appear, capped at three"""
+        text = "As a store manager, I want to notify each customer and admin user about orders"
+
+        assert extractor._extract_user_types(text) == ["store manager", "manager", "customer"]
+
+    def test_keyword_scan_matches_regex_fallback_on_length_changing_lowercase(self, extractor):
+        """Keyword detection agrees with the regex fallback when lower() changes the text length"""
+        story = UserStory(
+            heading="\u0130audit the login flow",
+            description="Stripe payments are recorded",
+            acceptance_criteria=[]
+        )
+        context = extractor._analyze_story_context(story)
+        with patch.object(test_case_extractor_module, '_KEYWORD_AUTOMATON', None):
+            fallback_context = extractor._analyze_story_context(story)
+
+        assert context == fallback_context
+
+    def test_prompt_and_cache_key_are_stable_across_hash_seeds(self):
+        """The prompt (and so its cache key) does not depend on PYTHONHASHSEED"""
+        script = textwrap.dedent('''
+            from unittest.mock import patch, MagicMock
+            from src.models import UserStory
+            from src.response_cache import ResponseCache
+            from src.test_case_extractor import TestCaseExtractor, _SYSTEM_PROMPT_TOON
+
+            with patch('src.test_case_extractor.get_ai_client', return_value=MagicMock(model_name='gpt-4')):
+                extractor = TestCaseExtractor()
+            story = UserStory(
+                heading="Update customer profile",
+                description="As a customer, I want to change my email, phone, address, status and reference code",
+                acceptance_criteria=["Name, date, amount, price and priority are validated"]
+            )
+            prompt = extractor._build_extraction_prompt(story)
+            print("RESULT", ResponseCache.make_key(_SYSTEM_PROMPT_TOON, prompt, 'gpt-4', 0.7))
+        ''')
+        keys = set()
+        for seed in ("0", "1", "2", "3"):
+            env = {**os.environ, 'PYTHONHASHSEED': seed}
+            output = subprocess.run(
+                [sys.executable, '-c', script], env=env, capture_output=True, text=True, check=True,
+                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            ).stdout
+            keys.add(output.rsplit("RESULT ", 1)[1].strip())
+
+        assert len(keys) == 1
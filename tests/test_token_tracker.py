@@ -0,0 +1,179 @@
+import json
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import src.token_tracker as token_tracker_module
+from src.token_tracker import TokenTracker
+
+
+@pytest.fixture
+def make_tracker(tmp_path, monkeypatch):
+    """Build fresh TokenTracker singletons writing to a temporary LOG_DIR"""
+    monkeypatch.setenv('LOG_DIR', str(tmp_path))
+
+    def _make():
+        TokenTracker._instance = None
+        return TokenTracker()
+
+    yield _make
+    TokenTracker._instance = None
+
+
+def _record(tracker, call_type='test_case_extraction', toon_enabled=True):
+    return tracker.record_usage(
+        call_type=call_type,
+        prompt_text='p' * 400,
+        response_text='r' * 200,
+        toon_enabled=toon_enabled,
+        model='gpt-4o-mini',
+        provider='OPENAI'
+    )
+
+
+class TestPersistence:
+    def test_records_are_appended_and_reloaded(self, make_tracker, tmp_path):
+        """Records are written one per line and restored by a new tracker"""
+        tracker = make_tracker()
+        for _ in range(3):
+            _record(tracker)
+        tracker.force_save()
+
+        lines = (tmp_path / 'token_usage.jsonl').read_text().splitlines()
+        assert len(lines) == 3
+
+        reloaded = make_tracker()
+        assert len(reloaded.records) == 3
+        assert reloaded.stats.total_calls == 3
+
+    def test_legacy_single_file_records_are_migrated(self, make_tracker, tmp_path):
+        """Records stored in the old token_usage.json are moved into the JSONL log"""
+        tracker = make_tracker()
+        _record(tracker)
+        legacy = {'records': tracker.get_recent_records(1), 'stats': tracker.get_stats()}
+        (tmp_path / 'token_usage.jsonl').unlink()
+        (tmp_path / 'token_usage.json').write_text(json.dumps(legacy))
+
+        reloaded = make_tracker()
+
+        assert len(reloaded.records) == 1
+        assert (tmp_path / 'token_usage.jsonl').read_text().count('\n') == 1
+
+    def test_truncated_stats_file_keeps_records(self, make_tracker, tmp_path):
+        """A stats file cut off mid-write does not stop the record log from loading"""
+        tracker = make_tracker()
+        for _ in range(2):
+            _record(tracker)
+        tracker.close()
+        (tmp_path / 'token_usage.json').write_text('{"stats": {"total_ca')
+
+        reloaded = make_tracker()
+
+        assert len(reloaded.records) == 2
+        assert reloaded.stats.total_calls == 0
+
+    def test_periodic_save_runs_in_background(self, make_tracker, tmp_path, monkeypatch):
+        """Every SAVE_INTERVAL calls the stats file is written by the saver thread"""
+        monkeypatch.setattr(TokenTracker, 'SAVE_DEBOUNCE_SECONDS', 0.0)
+        tracker = make_tracker()
+        for _ in range(TokenTracker.SAVE_INTERVAL):
+            _record(tracker)
+
+        stats_file = tmp_path / 'token_usage.json'
+        deadline = time.monotonic() + 5
+        while not stats_file.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        saved = json.loads(stats_file.read_text())  # written via rename, so never partial
+        assert saved['stats']['total_calls'] == TokenTracker.SAVE_INTERVAL
+
+    def test_save_writes_files_without_holding_the_lock(self, make_tracker, tmp_path, monkeypatch):
+        """Stats are written after the tracker lock is released, and compaction keeps every record"""
+        monkeypatch.setattr(TokenTracker, 'RECORDS_LOG_COMPACT_LINES', 3)
+        tracker = make_tracker()
+        for _ in range(5):
+            _record(tracker)
+
+        lock_held = []
+        real_replace = token_tracker_module.os.replace
+
+        def tracking_replace(src, dst):
+            if dst == tracker.data_file:
+                lock_held.append(tracker._lock.locked())
+            real_replace(src, dst)
+
+        monkeypatch.setattr(token_tracker_module.os, 'replace', tracking_replace)
+        tracker.force_save()
+
+        assert lock_held == [False]
+        assert len((tmp_path / 'token_usage.jsonl').read_text().splitlines()) == 5
+        assert len(make_tracker().records) == 5
+
+
+class TestAggregates:
+    def test_average_reduction_tracks_toon_calls(self, make_tracker):
+        """The average reduction is kept over TOON calls and survives a reload"""
+        tracker = make_tracker()
+        _record(tracker, toon_enabled=True)
+        _record(tracker, toon_enabled=False)
+        _record(tracker, toon_enabled=True)
+        tracker.force_save()
+
+        expected = TokenTracker.TOON_REDUCTION_FACTOR * 100
+        assert tracker.stats.average_reduction_percentage == pytest.approx(expected)
+
+        reloaded = make_tracker()
+        _record(reloaded, toon_enabled=True)
+        assert reloaded.stats.calls_with_toon == 3
+        assert reloaded.stats.average_reduction_percentage == pytest.approx(expected)
+
+
+class TestDashboard:
+    def test_dashboard_only_includes_last_24_hours(self, make_tracker, monkeypatch):
+        """Records older than a day are left out of the recent and hourly views"""
+        class _TwoDaysAgo(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return datetime.now(tz) - timedelta(days=2)
+
+        tracker = make_tracker()
+        monkeypatch.setattr(token_tracker_module, 'datetime', _TwoDaysAgo)
+        _record(tracker)
+        monkeypatch.setattr(token_tracker_module, 'datetime', datetime)
+        _record(tracker)
+
+        data = tracker.get_dashboard_data()
+
+        assert len(data['recent_records']) == 1
+        assert sum(bucket['calls'] for bucket in data['hourly_usage'].values()) == 1
+        assert data['by_call_type']['test_case_extraction']['total_calls'] == 2
+
+    def test_call_type_totals_follow_the_records_window(self, make_tracker):
+        """Per-call-type totals drop records that fall out of the bounded deque"""
+        tracker = make_tracker()
+        _record(tracker, call_type='story_extraction')
+        for _ in range(tracker.records.maxlen):
+            _record(tracker, call_type='test_case_extraction')
+
+        by_call_type = tracker.get_dashboard_data()['by_call_type']
+
+        assert 'story_extraction' not in by_call_type
+        assert by_call_type['test_case_extraction']['total_calls'] == tracker.records.maxlen
+        assert by_call_type['test_case_extraction']['avg_tokens'] == tracker.records[0].total_tokens
+
+    def test_dashboard_is_cached_until_usage_is_recorded(self, make_tracker):
+        """Repeated dashboard reads reuse the payload; recording usage rebuilds it"""
+        tracker = make_tracker()
+        _record(tracker)
+
+        first = tracker.get_dashboard_data()
+        first['toon_config'] = {'enabled': True}  # callers may add keys, as the dashboard route does
+        cached = tracker.get_dashboard_data()
+        assert cached['stats'] is first['stats']
+        assert 'toon_config' not in cached
+
+        _record(tracker)
+        refreshed = tracker.get_dashboard_data()
+        assert refreshed['stats'] is not first['stats']
+        assert refreshed['stats']['total_calls'] == 2